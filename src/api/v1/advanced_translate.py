@@ -35,12 +35,12 @@ async def translate_document_advanced(
             "extract_text": True,
             "preserve_layout": preserve_layout,
             "extract_tables": extract_tables,
-            "extract_images": extract_images
+            "extract_images": extract_images,
+            "table_csv": False  # Only table counts are returned
         })
         
         # Save uploaded file
-        file_data = await file.read()
-        file_path = await storage_service.save_upload(file_data, file.filename)
+        file_path = await storage_service.save_upload(file, file.filename)
         
         # Extract content
         extraction_result = await pdf_processor.process(file_path)
@@ -3,23 +3,99 @@ API endpoints for large document translation (500+ pages)
 FIXED: Target language parameter handling and debug logs
 """
 import json
-from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks, Form
-from fastapi.responses import JSONResponse, FileResponse
+import asyncio
+from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks, Form, Request
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse, FileResponse, Response
 from typing import Optional
 import os
+import re
 import tempfile
 from pathlib import Path
 import logging
-import uuid
+import secrets
 from datetime import datetime
 
 # Import Celery tasks directly
 from src.celery_tasks.prismy_tasks import process_translation_sync
 from src.core.models import JobStatus
+from src.services.queue.redis_client import create_job_hash, transition_job_status, OUTPUT_KEY_PREFIX
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(tags=["large-documents"])
+# Upload size limit
+MAX_UPLOAD_MB = 100
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+class UploadLimitRoute(APIRoute):
+    """Route that answers 413 from the Content-Length header, before FastAPI reads the body"""
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def limited_handler(request: Request) -> Response:
+            try:
+                content_length = int(request.headers.get("content-length", 0))
+            except ValueError:
+                content_length = 0
+            
+            if content_length > MAX_UPLOAD_BYTES:
+                return JSONResponse(status_code=413, content={"detail": {
+                    "error": "File too large",
+                    "message": f"Request size: {content_length / (1024 * 1024):.1f}MB (max {MAX_UPLOAD_MB}MB)",
+                    "max_size_mb": MAX_UPLOAD_MB
+                }})
+            return await handler(request)
+        
+        return limited_handler
+
+router = APIRouter(tags=["large-documents"], route_class=UploadLimitRoute)
+
+# Everything the status endpoint reports; leaves out the large result blobs
+_STATUS_FIELDS = (
+    "status", "progress", "total_pages", "file_type", "file_extension",
+    "file_description", "source_language", "target_language", "tier", "error",
+    "output_file", "message", "created_at", "updated_at", "estimated_time",
+    "file_size_mb", "celery_task_id"
+)
+_CANCEL_FIELDS = ("status", "celery_task_id")
+# Job fields read by the download endpoint
+_DOWNLOAD_FIELDS = (
+    "status", "output_path", "output_media_type", "original_filename",
+    "output_file", "output_storage", "error", "progress"
+)
+
+# Language aliases mapped to standard codes
+_LANG_MAP = {
+    'en': 'en', 'english': 'en', 'eng': 'en',
+    'vi': 'vi', 'vietnamese': 'vi', 'vie': 'vi',
+    'zh': 'zh', 'chinese': 'zh', 'chi': 'zh',
+    'ja': 'ja', 'japanese': 'ja', 'jpn': 'ja',
+    'ko': 'ko', 'korean': 'ko', 'kor': 'ko',
+    'fr': 'fr', 'french': 'fr', 'fra': 'fr',
+    'de': 'de', 'german': 'de', 'deu': 'de',
+    'es': 'es', 'spanish': 'es', 'spa': 'es',
+    'auto': 'auto'
+}
+
+# Upload directory and filename sanitization
+_UPLOAD_DIR = Path(tempfile.gettempdir()) / "prismy_uploads"
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9._-]')
+_MAX_SAFE_FILENAME = 64
+
+def _safe_filename(filename: str) -> str:
+    """Reduce an untrusted upload filename to an ASCII-safe basename, keeping its extension"""
+    name = os.path.basename(filename.replace('\\', '/'))
+    name = _UNSAFE_FILENAME_CHARS.sub('_', name)
+    if len(name) > _MAX_SAFE_FILENAME:
+        stem, ext = os.path.splitext(name)
+        name = stem[:_MAX_SAFE_FILENAME - len(ext)] + ext
+    return name or "upload"
+
+def _norm_lang(lang: Optional[str], default: str) -> str:
+    """Normalize a language parameter and map it to a standard code"""
+    lang = lang.strip().lower() if lang else default
+    return _LANG_MAP.get(lang, lang)
 
 # ============================================
 # HELPER FUNCTIONS FOR REDIS HASH OPERATIONS
@@ -46,9 +122,8 @@ def store_job_data_as_hash(job_id: str, job_data: dict) -> None:
     hash_data['created_at'] = datetime.utcnow().isoformat()
     hash_data['updated_at'] = datetime.utcnow().isoformat()
     
-    # Store as hash with expiration
-    r.hset(f"prismy:job:{job_id}", mapping=hash_data)
-    r.expire(f"prismy:job:{job_id}", 86400)  # 24 hours expiration
+    # Store hash and expiration in one atomic script call
+    create_job_hash(r, job_id, hash_data)
 
 def get_job_data_from_hash(job_id: str) -> dict:
     """Get job data from Redis hash"""
@@ -77,6 +152,57 @@ def get_job_data_from_hash(job_id: str) -> dict:
     
     return {}
 
+def get_job_fields(job_id: str, fields: tuple) -> dict:
+    """Get selected job fields from Redis hash with a single HMGET, omitting missing ones"""
+    r = get_redis_client()
+    values = r.hmget(f"prismy:job:{job_id}", fields)
+    return {field: value for field, value in zip(fields, values) if value is not None}
+
+def _download_headers(download_filename: str, media_type: str) -> dict:
+    """Response headers for an attachment download"""
+    return {
+        "Content-Disposition": f'attachment; filename="{download_filename}"',
+        "Content-Type": media_type,
+        "Cache-Control": "no-cache, no-store, must-revalidate",
+        "Pragma": "no-cache",
+        "Expires": "0"
+    }
+
+def _find_output_file(job_id: str, output_path: Optional[str], output_file: Optional[str]) -> Optional[str]:
+    """Locate the output file for jobs that predate output_media_type"""
+    # Method 1: Try output_path directly
+    if output_path and Path(output_path).exists():
+        return output_path
+    
+    # Method 2: Try output_file in common directories
+    if output_file:
+        possible_dirs = [
+            os.environ.get("OUTPUT_DIR", "outputs"),
+            "outputs",
+            "storage/outputs", 
+            "/tmp",
+            tempfile.gettempdir()
+        ]
+        
+        for base_dir in possible_dirs:
+            potential_path = Path(base_dir) / output_file
+            if potential_path.exists():
+                return str(potential_path)
+    
+    # Method 3: Search for file with job_id pattern
+    search_dirs = ["outputs", "storage/outputs", tempfile.gettempdir()]
+    search_pattern = f"translated_{job_id}.*"
+    
+    for search_dir in search_dirs:
+        search_path = Path(search_dir)
+        if search_path.exists():
+            import glob
+            matches = glob.glob(str(search_path / search_pattern))
+            if matches:
+                return matches[0]
+    
+    return None
+
 def get_file_type_info(filename: str) -> dict:
     """Get file type information and detect correct file type"""
     file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
@@ -115,6 +241,18 @@ def get_file_type_info(filename: str) -> dict:
         'celery_type': 'unknown'
     })
 
+def _write_temp_file(temp_path: Path, content: bytes) -> None:
+    """Write uploaded content to the temp upload directory (blocking)"""
+    temp_path.parent.mkdir(exist_ok=True)
+    with open(temp_path, "wb") as f:
+        f.write(content)
+
+def _count_pdf_pages(pdf_path: Path) -> int:
+    """Count PDF pages (blocking)"""
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
 def estimate_processing_time(file_size_mb: float, file_type: str, total_pages: int = 1) -> dict:
     """Estimate processing time based on file type and size"""
     
@@ -153,44 +291,28 @@ async def translate_large_document(
         Job ID and status
     """
     try:
+        # Oversize uploads with a Content-Length are already rejected by UploadLimitRoute
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
         # ✅ DEBUG: Log exact parameters received from form
-        logger.info(f"🔍 API FORM DEBUG - Raw Parameters Received:")
-        logger.info(f"📁 file.filename: {file.filename}")
-        logger.info(f"📁 file.content_type: {getattr(file, 'content_type', 'unknown')}")
-        logger.info(f"🗣️ source_lang (raw): '{source_lang}' (type: {type(source_lang)})")
-        logger.info(f"🎯 target_lang (raw): '{target_lang}' (type: {type(target_lang)})")  # ← Key debug
-        logger.info(f"⭐ tier (raw): '{tier}' (type: {type(tier)})")
-        
-        # ✅ VALIDATION: Normalize and validate language parameters
-        source_lang = source_lang.strip().lower() if source_lang else "auto"
-        target_lang = target_lang.strip().lower() if target_lang else "vi"
+        if debug:
+            logger.debug("🔍 API FORM DEBUG - Raw Parameters Received:")
+            logger.debug("📁 file.filename: %s", file.filename)
+            logger.debug("📁 file.content_type: %s", getattr(file, 'content_type', 'unknown'))
+            logger.debug("🗣️ source_lang (raw): %r", source_lang)
+            logger.debug("🎯 target_lang (raw): %r", target_lang)
+            logger.debug("⭐ tier (raw): %r", tier)
+        
+        # ✅ VALIDATION: Normalize and map language parameters to standard codes
+        mapped_source = _norm_lang(source_lang, "auto")
+        mapped_target = _norm_lang(target_lang, "vi")
         tier = tier.strip().lower() if tier else "standard"
         
-        logger.info(f"🔧 NORMALIZED PARAMETERS:")
-        logger.info(f"🗣️ source_lang (normalized): '{source_lang}'")
-        logger.info(f"🎯 target_lang (normalized): '{target_lang}'")  # ← Should show 'en' when sent
-        logger.info(f"⭐ tier (normalized): '{tier}'")
-        
-        # ✅ VALIDATION: Language code mapping
-        language_mappings = {
-            'en': 'en', 'english': 'en', 'eng': 'en',
-            'vi': 'vi', 'vietnamese': 'vi', 'vie': 'vi',
-            'zh': 'zh', 'chinese': 'zh', 'chi': 'zh',
-            'ja': 'ja', 'japanese': 'ja', 'jpn': 'ja',
-            'ko': 'ko', 'korean': 'ko', 'kor': 'ko',
-            'fr': 'fr', 'french': 'fr', 'fra': 'fr',
-            'de': 'de', 'german': 'de', 'deu': 'de',
-            'es': 'es', 'spanish': 'es', 'spa': 'es',
-            'auto': 'auto'
-        }
-        
-        # Map languages to standard codes
-        mapped_source = language_mappings.get(source_lang, source_lang)
-        mapped_target = language_mappings.get(target_lang, target_lang)
-        
-        logger.info(f"🗺️ LANGUAGE MAPPING:")
-        logger.info(f"🗣️ source: '{source_lang}' → '{mapped_source}'")
-        logger.info(f"🎯 target: '{target_lang}' → '{mapped_target}'")  # ← Should show en
+        if debug:
+            logger.debug("🔧 NORMALIZED PARAMETERS:")
+            logger.debug("🗣️ source: %r → %r", source_lang, mapped_source)
+            logger.debug("🎯 target: %r → %r", target_lang, mapped_target)
+            logger.debug("⭐ tier (normalized): %r", tier)
         
         # ✅ VALIDATION: File type check
         supported_extensions = ('.pdf', '.txt', '.doc', '.docx')
@@ -207,17 +329,17 @@ async def translate_large_document(
         
         # Get file type information
         file_info = get_file_type_info(file.filename)
-        logger.info(f"Processing {file_info['description']}: {file.filename}")
+        logger.debug("Processing %s: %s", file_info['description'], file.filename)
         
         # ✅ VALIDATION: File size check
         content = await file.read()
         file_size_mb = len(content) / (1024 * 1024)
         
-        if file_size_mb > 100:
+        if len(content) > MAX_UPLOAD_BYTES:
             raise HTTPException(413, {
                 "error": "File too large",
-                "message": f"File size: {file_size_mb:.1f}MB (max 100MB)",
-                "max_size_mb": 100
+                "message": f"File size: {file_size_mb:.1f}MB (max {MAX_UPLOAD_MB}MB)",
+                "max_size_mb": MAX_UPLOAD_MB
             })
             
         if len(content) == 0:
@@ -227,17 +349,12 @@ async def translate_large_document(
             })
         
         # ✅ SAVE FILE: Create temp file with proper handling
-        temp_dir = Path(tempfile.gettempdir()) / "prismy_uploads"
-        temp_dir.mkdir(exist_ok=True)
-        
-        job_id = str(uuid.uuid4())
-        temp_filename = f"{job_id}_{file.filename}"
-        temp_path = temp_dir / temp_filename
+        job_id = secrets.token_hex(16)
+        temp_path = _UPLOAD_DIR / f"{job_id}_{_safe_filename(file.filename)}"
         
-        with open(temp_path, "wb") as f:
-            f.write(content)
+        await asyncio.to_thread(_write_temp_file, temp_path, content)
         
-        logger.info(f"File saved: {temp_path} ({file_size_mb:.2f}MB)")
+        logger.debug("File saved: %s (%.2fMB)", temp_path, file_size_mb)
         
         # ✅ ESTIMATE PAGES: Get page count for different file types
         total_pages = 1  # Default
@@ -248,10 +365,8 @@ async def translate_large_document(
             if file_extension == 'pdf':
                 # Count PDF pages
                 try:
-                    import pdfplumber
-                    with pdfplumber.open(temp_path) as pdf:
-                        total_pages = len(pdf.pages)
-                    logger.info(f"PDF pages detected: {total_pages}")
+                    total_pages = await asyncio.to_thread(_count_pdf_pages, temp_path)
+                    logger.debug("PDF pages detected: %d", total_pages)
                 except Exception as e:
                     logger.warning(f"Could not count PDF pages: {e}, using file size estimate")
                     total_pages = max(1, int(file_size_mb * 2))  # ~0.5MB per page estimate
@@ -261,7 +376,7 @@ async def translate_large_document(
                 # Rough estimate: 1 page ≈ 2-4KB for plain text content
                 estimated_pages = max(1, int(file_size_mb * 1024 / 3))  # 3KB per page
                 total_pages = min(estimated_pages, 500)  # Cap at 500 pages
-                logger.info(f"Word document estimated pages: {total_pages}")
+                logger.debug("Word document estimated pages: %d", total_pages)
                 
             elif file_extension == 'txt':
                 # Text files are typically 1 "page"
@@ -274,9 +389,14 @@ async def translate_large_document(
         # ✅ PROCESSING TIME ESTIMATE
         estimate = estimate_processing_time(file_size_mb, file_info['type'], total_pages)
         
+        # The Celery task id is chosen up front and stored with the job, so a cancel
+        # can revoke the task as soon as the job exists
+        celery_task_id = secrets.token_hex(16)
+        
         # ✅ CREATE JOB: Store initial job data with MAPPED languages
         job_data = {
             "job_id": job_id,
+            "celery_task_id": celery_task_id,
             "status": JobStatus.PENDING.value,
             "progress": 0,
             "total_pages": total_pages,
@@ -293,41 +413,43 @@ async def translate_large_document(
             "message": f"Job created. Processing {file_info['description']}..."
         }
         
-        logger.info(f"📋 JOB DATA CREATED:")
-        logger.info(f"🗣️ source_language in job: '{job_data['source_language']}'")
-        logger.info(f"🎯 target_language in job: '{job_data['target_language']}'")  # ← Should be 'en'
+        if debug:
+            logger.debug("📋 JOB DATA CREATED:")
+            logger.debug("🗣️ source_language in job: %r", job_data['source_language'])
+            logger.debug("🎯 target_language in job: %r", job_data['target_language'])
         
         # Store job data in Redis
-        store_job_data_as_hash(job_id, job_data)
+        await asyncio.to_thread(store_job_data_as_hash, job_id, job_data)
         
         # ✅ START CELERY TASK: Launch translation process
         try:
-            logger.info(f"🚀 STARTING CELERY TASK:")
-            logger.info(f"📁 File Path: {temp_path}")
-            logger.info(f"📄 File Type: {file_info['celery_type']}")
-            logger.info(f"🎯 Target Language → Celery: '{mapped_target}'")  # ← Should be 'en'
-            logger.info(f"⭐ Tier: {tier}")
+            if debug:
+                logger.debug("🚀 STARTING CELERY TASK:")
+                logger.debug("📁 File Path: %s", temp_path)
+                logger.debug("📄 File Type: %s", file_info['celery_type'])
+                logger.debug("🎯 Target Language → Celery: %r", mapped_target)
+                logger.debug("⭐ Tier: %s", tier)
             
             # Use the fixed sync task with MAPPED target language
-            task_result = process_translation_sync.apply_async(
+            task_result = await asyncio.to_thread(
+                process_translation_sync.apply_async,
                 args=[job_id, str(temp_path), file_info['celery_type'], mapped_target, tier],
                 #                                                        ↑ Use mapped_target
-                queue='default'
+                queue='default',
+                task_id=celery_task_id
             )
             
-            # Update job with task ID
-            job_data['celery_task_id'] = task_result.id
-            store_job_data_as_hash(job_id, job_data)
-            
-            logger.info(f"✅ Celery task started: {task_result.id}")
-            logger.info(f"🎯 FINAL CHECK - Task called with target_lang: '{mapped_target}'")
+            logger.info("✅ Celery task started: %s (target_lang=%s)", task_result.id, mapped_target)
             
         except Exception as e:
             logger.error(f"❌ Failed to start Celery task: {e}")
             # Update job as failed
             job_data['status'] = JobStatus.FAILED.value
             job_data['error'] = f"Failed to start processing: {str(e)}"
-            store_job_data_as_hash(job_id, job_data)
+            await asyncio.to_thread(transition_job_status, get_redis_client(), job_id, JobStatus.FAILED.value, {
+                "error": job_data['error'],
+                "updated_at": datetime.utcnow().isoformat()
+            })
             
             raise HTTPException(500, {
                 "error": "Processing failed",
@@ -335,7 +457,7 @@ async def translate_large_document(
                 "job_id": job_id
             })
         
-        logger.info(f"Job created successfully: {job_id} for {file_info['description']} ({file_size_mb:.2f}MB)")
+        logger.info("Job created successfully: %s for %s (%.2fMB)", job_id, file_info['description'], file_size_mb)
         
         # ✅ RETURN RESPONSE
         return JSONResponse({
@@ -370,8 +492,8 @@ async def translate_large_document(
 async def get_job_status(job_id: str):
     """Get job status and progress"""
     try:
-        # Get job data using hash operations
-        data = get_job_data_from_hash(job_id)
+        # Fetch only the reported fields, never the result payloads
+        data = await asyncio.to_thread(get_job_fields, job_id, _STATUS_FIELDS)
         
         if not data:
             raise HTTPException(404, {
@@ -416,8 +538,8 @@ async def get_job_status(job_id: str):
 async def download_result(job_id: str):
     """Download translation result"""
     try:
-        # Get job data using hash operations
-        data = get_job_data_from_hash(job_id)
+        # Fetch only the fields needed to serve the download in one round-trip
+        data = await asyncio.to_thread(get_job_fields, job_id, _DOWNLOAD_FIELDS)
         
         if not data:
             raise HTTPException(404, {
@@ -427,10 +549,10 @@ async def download_result(job_id: str):
             })
         
         # Check job status
-        status = data.get("status", "unknown")
+        status = data.get("status") or "unknown"
         if status != "completed":
             if status == "failed":
-                error_msg = data.get("error", "Unknown error")
+                error_msg = data.get("error") or "Unknown error"
                 raise HTTPException(400, {
                     "error": "Job failed",
                     "message": f"Translation failed: {error_msg}",
@@ -443,87 +565,61 @@ async def download_result(job_id: str):
                     "message": f"Job is still {status}. Please wait for completion.",
                     "job_id": job_id,
                     "status": status,
-                    "progress": data.get("progress", 0)
+                    "progress": data.get("progress") or 0
                 })
         
         # Get file paths
         output_file = data.get('output_file')
         output_path = data.get('output_path')
-        original_filename = data.get('original_filename', 'translated_document')
-        
-        # Try to find the output file
-        file_path = None
-        
-        # Method 1: Try output_path directly
-        if output_path and Path(output_path).exists():
+        media_type = data.get('output_media_type')
+        original_filename = data.get('original_filename') or 'translated_document'
+        
+        base_name = Path(original_filename).stem
+        
+        if data.get('output_storage') == 'redis':
+            # Small outputs are kept in Redis by the worker; serve them without touching disk
+            content = await asyncio.to_thread(get_redis_client().get, f"{OUTPUT_KEY_PREFIX}{job_id}")
+            if content is not None:
+                media_type = media_type or 'text/plain; charset=utf-8'
+                file_ext = os.path.splitext(output_file or "")[1] or ".txt"
+                download_filename = f"translated_{base_name}{file_ext}"
+                logger.debug("📥 Serving download: %s from Redis", download_filename)
+                return Response(
+                    content=content,
+                    media_type=media_type,
+                    headers=_download_headers(download_filename, media_type)
+                )
+        
+        if output_path and media_type:
+            # Worker recorded the final path and media type on completion
             file_path = output_path
-            logger.info(f"Found file at output_path: {file_path}")
-        
-        # Method 2: Try output_file in common directories
-        elif output_file:
-            possible_dirs = [
-                os.environ.get("OUTPUT_DIR", "outputs"),
-                "outputs",
-                "storage/outputs", 
-                "/tmp",
-                tempfile.gettempdir()
-            ]
+        else:
+            # Older jobs: locate the output file and derive the media type
+            file_path = await asyncio.to_thread(_find_output_file, job_id, output_path, output_file)
             
-            for base_dir in possible_dirs:
-                potential_path = Path(base_dir) / output_file
-                if potential_path.exists():
-                    file_path = str(potential_path)
-                    logger.info(f"Found file at: {file_path}")
-                    break
-        
-        # Method 3: Search for file with job_id pattern
-        if not file_path:
-            search_dirs = ["outputs", "storage/outputs", tempfile.gettempdir()]
-            search_pattern = f"translated_{job_id}.*"
+            if not file_path:
+                raise HTTPException(404, {
+                    "error": "Output file not found",
+                    "message": "Translation completed but output file is missing",
+                    "job_id": job_id,
+                    "searched_paths": [output_path, output_file] if output_path or output_file else [],
+                    "status": status
+                })
             
-            for search_dir in search_dirs:
-                search_path = Path(search_dir)
-                if search_path.exists():
-                    import glob
-                    matches = glob.glob(str(search_path / search_pattern))
-                    if matches:
-                        file_path = matches[0]
-                        logger.info(f"Found file by pattern: {file_path}")
-                        break
-        
-        if not file_path or not Path(file_path).exists():
-            raise HTTPException(404, {
-                "error": "Output file not found",
-                "message": "Translation completed but output file is missing",
-                "job_id": job_id,
-                "searched_paths": [output_path, output_file] if output_path or output_file else [],
-                "status": status
-            })
+            media_type = 'application/pdf' if file_path.endswith('.pdf') else 'text/plain; charset=utf-8'
         
         # Generate appropriate download filename
-        base_name = Path(original_filename).stem if original_filename else "translated_document"
-        file_ext = Path(file_path).suffix or ".txt"
+        file_ext = os.path.splitext(file_path)[1] or ".txt"
         download_filename = f"translated_{base_name}{file_ext}"
         
-        # Determine media type
-        media_type = 'text/plain; charset=utf-8'
-        if file_ext == '.pdf':
-            media_type = 'application/pdf'
-        
-        logger.info(f"📥 Serving download: {download_filename} from {file_path}")
+        logger.debug("📥 Serving download: %s from %s", download_filename, file_path)
         
         # Return file for download
         return FileResponse(
             path=file_path,
             media_type=media_type,
             filename=download_filename,
-            headers={
-                "Content-Disposition": f'attachment; filename="{download_filename}"',
-                "Content-Type": media_type,
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
+            headers=_download_headers(download_filename, media_type)
         )
         
     except HTTPException:
@@ -598,7 +694,7 @@ async def get_queue_status():
 async def cancel_job(job_id: str):
     """Cancel a job"""
     try:
-        data = get_job_data_from_hash(job_id)
+        data = await asyncio.to_thread(get_job_fields, job_id, _CANCEL_FIELDS)
         
         if not data:
             raise HTTPException(404, "Job not found")
@@ -622,8 +718,7 @@ async def cancel_job(job_id: str):
         
         # Update job status
         r = get_redis_client()
-        r.hset(f"prismy:job:{job_id}", mapping={
-            "status": "cancelled",
+        transition_job_status(r, job_id, "cancelled", {
             "error": "Cancelled by user",
             "updated_at": datetime.utcnow().isoformat(),
             "progress": 0
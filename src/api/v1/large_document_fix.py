@@ -1,23 +1,32 @@
 # Fix download endpoint - chỉ copy phần cần sửa
 import json
+import os
 from pathlib import Path
 from fastapi import HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 import redis
 
+# Shared connection pool, created once per process
+_pool = redis.ConnectionPool.from_url("redis://localhost:6379", max_connections=64)
+_r = redis.Redis(connection_pool=_pool)
+
+# When set (e.g. "/protected-outputs"), nginx serves the file via X-Accel-Redirect
+_ACCEL_REDIRECT_PREFIX = os.environ.get("X_ACCEL_REDIRECT_PREFIX", "").rstrip("/")
+
 # Replace the download endpoint
 async def download_result_new(job_id: str):
     """Download translation result - Fixed to get from Redis result"""
-    # Connect to Redis
-    r = redis.from_url("redis://localhost:6379")
+    # Fetch job and result in one round-trip
+    pipe = _r.pipeline(transaction=False)
+    pipe.hgetall(f"prismy:job:{job_id}")
+    pipe.get(f"result:{job_id}")
+    job_data, result_data = pipe.execute()
     
     # Check job exists
-    job_data = r.hgetall(f"prismy:job:{job_id}")
     if not job_data:
         raise HTTPException(404, "Job not found")
     
-    # Get result from Redis
-    result_data = r.get(f"result:{job_id}")
+    # Check result from Redis
     if not result_data:
         # Check status
         status = job_data.get(b'status', b'pending').decode('utf-8')
@@ -31,16 +40,36 @@ async def download_result_new(job_id: str):
         if not output_path:
             raise HTTPException(500, "Output path not found in result")
             
-        if not Path(output_path).exists():
+        filename = f"{job_id}_translated.pdf"
+        
+        # Let nginx stream the file from disk (zero-copy) instead of proxying bytes through Python
+        if _ACCEL_REDIRECT_PREFIX:
+            return Response(
+                media_type="application/pdf",
+                headers={
+                    "X-Accel-Redirect": f"{_ACCEL_REDIRECT_PREFIX}/{Path(output_path).name}",
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                    "Cache-Control": "private, max-age=300"
+                }
+            )
+        
+        # Single stat, reused by FileResponse instead of statting again
+        try:
+            stat_result = os.stat(output_path)
+        except FileNotFoundError:
             raise HTTPException(404, f"Output file not found at: {output_path}")
         
         # Return the PDF file
         return FileResponse(
             output_path,
-            filename=f"{job_id}_translated.pdf",
-            media_type="application/pdf"
+            stat_result=stat_result,
+            filename=filename,
+            media_type="application/pdf",
+            headers={"Cache-Control": "private, max-age=300"}
         )
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(500, "Invalid result data")
     except Exception as e:
@@ -35,8 +35,7 @@ async def translate_document(
         # Save upload
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{timestamp}_{file.filename}"
-        file_data = await file.read()
-        file_path = await storage_service.save_upload(file_data, filename)
+        file_path = await storage_service.save_upload(file, filename)
         
         logger.info(f"Processing: {filename} with {tier.value} tier")
         
@@ -5,85 +5,159 @@ from PIL import Image
 import pytesseract
 import re
 from typing import List, Dict, Tuple
+from functools import partial
+
+from src.utils.page_pool import page_pool_workers, run_page_ranges, threadsafe_mp_context
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+OCR_MAX_WORKERS = 4
+# PDFs up to this many pages are processed serially: each worker loads its own Tesseract
+# handles, which only pays off once there are enough pages to spread
+OCR_PARALLEL_MIN_PAGES = 8
+FORMULA_MIN_SYMBOLS = 5
+
+MATH_PATTERNS = [
+    r'\$[^$]+\$',  # Inline math
+    r'\$\$[^$]+\$\$',  # Display math
+    r'\\begin\{equation\}.*?\\end\{equation\}',
+    r'\\begin\{align\}.*?\\end\{align\}'
+]
 
 class AdvancedPDFProcessor:
     def __init__(self):
-        self.math_patterns = [
-            r'\$[^$]+\$',  # Inline math
-            r'\$\$[^$]+\$\$',  # Display math
-            r'\\begin\{equation\}.*?\\end\{equation\}',
-            r'\\begin\{align\}.*?\\end\{align\}'
-        ]
+        self.math_patterns = MATH_PATTERNS
+        
+        # Persistent Tesseract handles: language data loads once, no subprocess per call
+        self._api = None
+        self._formula_api = None
+        if TESSEROCR_AVAILABLE:
+            self._api = tesserocr.PyTessBaseAPI(lang='vie+eng')
+            self._formula_api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_LINE)
+    
+    def close(self):
+        """Release the Tesseract API handles"""
+        for api in (self._api, self._formula_api):
+            if api is not None:
+                api.End()
+        self._api = None
+        self._formula_api = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def __del__(self):
+        self.close()
+    
+    def _ocr_page(self, gray: np.ndarray) -> str:
+        """OCR a rendered 8-bit grayscale page with Vietnamese support"""
+        if self._api is None:
+            return pytesseract.image_to_string(Image.fromarray(gray), lang='vie+eng')
+        height, width = gray.shape
+        self._api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        return self._api.GetUTF8Text()
+    
+    def _ocr_formula(self, img: Image.Image) -> str:
+        """OCR a formula image as a single text line"""
+        if self._formula_api is None:
+            return pytesseract.image_to_string(img, config='--psm 7')
+        self._formula_api.SetImage(img)
+        return self._formula_api.GetUTF8Text()
     
     def extract_with_ocr(self, pdf_path: str) -> List[Dict]:
         """Extract text with OCR support for scanned PDFs"""
         doc = fitz.open(pdf_path)
-        pages_data = []
+        page_count = len(doc)
         
-        for page_num, page in enumerate(doc):
-            # Try text extraction first
-            text = page.get_text()
-            
-            # If no text (scanned PDF), use OCR
-            if len(text.strip()) < 10:
-                # Convert page to image
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better OCR
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-                
-                # OCR with Vietnamese support
-                text = pytesseract.image_to_string(img, lang='vie+eng')
-            
-            # Extract images that might contain formulas
-            image_list = page.get_images()
-            formulas = []
-            
-            for img_index, img in enumerate(image_list):
-                # Extract image
-                xref = img[0]
-                pix = fitz.Pixmap(doc, xref)
-                if pix.n - pix.alpha < 4:  # GRAY or RGB
-                    img_data = pix.tobytes("png")
-                    # Check if image contains formula
-                    if self.is_formula_image(img_data):
-                        formula_text = self.extract_formula(img_data)
-                        formulas.append(formula_text)
-                pix = None
-            
-            pages_data.append({
-                'page_num': page_num,
-                'text': text,
-                'formulas': formulas,
-                'has_ocr': len(text.strip()) < 10
-            })
+        # Render + OCR is CPU-bound, so spread pages over worker processes
+        workers = page_pool_workers(page_count, OCR_PARALLEL_MIN_PAGES, OCR_MAX_WORKERS)
+        if not workers:
+            pages_data = [self.extract_page(doc, page_num) for page_num in range(page_count)]
+            doc.close()
+            return pages_data
         
         doc.close()
-        return pages_data
+        # Callers may run this off an event loop's thread, so the pool mustn't fork
+        return run_page_ranges(partial(_process_pages, pdf_path), page_count, workers, threadsafe_mp_context())
     
-    def is_formula_image(self, img_data: bytes) -> bool:
-        """Detect if image likely contains mathematical formula"""
-        img = cv2.imdecode(np.frombuffer(img_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    def extract_page(self, doc, page_num: int) -> Dict:
+        """Extract text and formulas from a single page"""
+        page = doc[page_num]
         
-        # Check for mathematical symbols using contour analysis
+        # Try text extraction first: one pass over text blocks only (flags=0 skips image blocks)
+        blocks = page.get_text("blocks", flags=0)
+        text = "".join(block[4] for block in blocks)
+        
+        # If no text (scanned PDF), use OCR
+        use_ocr = not blocks or len(text.strip()) < 10
+        if use_ocr:
+            # Render page straight to 8-bit grayscale (2x zoom for better OCR), no PNG round-trip
+            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csGRAY, alpha=False)
+            gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+            
+            # OCR with Vietnamese support
+            text = self._ocr_page(gray)
+        
+        # Extract images that might contain formulas
+        image_list = page.get_images()
+        formulas = []
+        
+        for img_index, img in enumerate(image_list):
+            # Extract image
+            xref = img[0]
+            pix = fitz.Pixmap(doc, xref)
+            if pix.n - pix.alpha < 4:  # GRAY or RGB
+                # Decode pixmap samples straight into a grayscale array, no PNG codec
+                gray = self._pixmap_to_gray(pix)
+                # Check if image contains formula
+                if self.is_formula_image(gray):
+                    formula_text = self.extract_formula(gray)
+                    formulas.append(formula_text)
+            pix = None
+        
+        return {
+            'page_num': page_num,
+            'text': text,
+            'formulas': formulas,
+            'has_ocr': use_ocr
+        }
+    
+    @staticmethod
+    def _pixmap_to_gray(pix) -> np.ndarray:
+        """View a GRAY/RGB pixmap's samples as an 8-bit grayscale array"""
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # drop alpha
+        if pix.n != 1:
+            pix = fitz.Pixmap(fitz.csGRAY, pix)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    
+    def is_formula_image(self, img: np.ndarray) -> bool:
+        """Detect if a grayscale image likely contains mathematical formula"""
+        # Check for mathematical symbols using connected-component analysis
         _, binary = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY_INV)
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        num_labels = cv2.connectedComponents(binary, connectivity=8)[0]
         
-        # Heuristic: formulas have specific aspect ratios and symbol density
-        if len(contours) > 5:  # Multiple symbols
-            return True
-        return False
+        # Heuristic: formulas have multiple symbols. Label 0 is the background;
+        # every other component has a non-zero area, so the label count is enough
+        return num_labels - 1 > FORMULA_MIN_SYMBOLS
     
-    def extract_formula(self, img_data: bytes) -> str:
-        """Extract formula from image using OCR or ML model"""
+    def extract_formula(self, gray: np.ndarray) -> str:
+        """Extract formula from a grayscale image using OCR or ML model"""
         # For now, simple OCR - later can integrate pix2tex or Mathpix API
-        img = Image.open(io.BytesIO(img_data))
         
         # Preprocess for better formula OCR
-        img = img.convert('L')  # Grayscale
-        img = img.point(lambda x: 0 if x < 128 else 255, '1')  # Binary
+        binary = np.where(gray < 128, 0, 255).astype(np.uint8)  # Binary
+        img = Image.fromarray(binary)
         
         # OCR with math symbols
-        formula_text = pytesseract.image_to_string(img, config='--psm 7')
+        formula_text = self._ocr_formula(img)
         
         # Clean up common OCR errors in formulas
         formula_text = formula_text.replace('×', '*')
@@ -107,22 +181,35 @@ class AdvancedPDFProcessor:
         
         return extracted_tables
 
+# Per-process processor used by OCR pool workers
+_worker_processor = None
+
+def _process_pages(pdf_path: str, page_range: range) -> List[Dict]:
+    """Pool entry point: open the PDF in this process (fitz objects aren't picklable)"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = AdvancedPDFProcessor()
+    
+    doc = fitz.open(pdf_path)
+    try:
+        return [_worker_processor.extract_page(doc, page_num) for page_num in page_range]
+    finally:
+        doc.close()
+
 # Update main processor to use advanced extraction
 def extract_pdf_advanced(file_path: str, options: Dict) -> List[Dict]:
-    processor = AdvancedPDFProcessor()
-    
     # Extract with OCR and formula detection
-    pages_data = processor.extract_with_ocr(file_path)
-    
-    # Extract tables if needed
-    if options.get('extract_tables', True):
-        tables = processor.extract_tables(file_path)
+    with AdvancedPDFProcessor() as processor:
+        pages_data = processor.extract_with_ocr(file_path)
         
-        # Merge table data with pages
-        for table in tables:
-            page_idx = table['page'] - 1
-            if page_idx < len(pages_data):
-                pages_data[page_idx]['tables'] = pages_data[page_idx].get('tables', [])
-                pages_data[page_idx]['tables'].append(table['data'])
+        # Extract tables if needed
+        tables = processor.extract_tables(file_path) if options.get('extract_tables', True) else []
+    
+    # Merge table data with pages
+    for table in tables:
+        page_idx = table['page'] - 1
+        if page_idx < len(pages_data):
+            pages_data[page_idx]['tables'] = pages_data[page_idx].get('tables', [])
+            pages_data[page_idx]['tables'].append(table['data'])
     
     return pages_data
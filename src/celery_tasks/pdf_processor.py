@@ -2,14 +2,55 @@ import fitz
 import redis
 from celery import Task
 from typing import List, Dict
-import json
+import hashlib
+import re
 from datetime import datetime
+from pathlib import Path
 from celery_app import app
 from ..utils.pdf_advanced import AdvancedPDFExtractor
-from .translation_apis import translate_with_tier
+from .translation_apis import translate_with_tier, translate_batch_with_tier
 
 redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
 
+# Chunks are translated and flushed to Redis in batches of CHUNK_BATCH_SIZE
+CHUNK_BATCH_SIZE = 32
+PROGRESS_STEP = 5
+
+# Chunk data is stored column-wise: one Redis list per field, indexed by chunk id
+CHUNK_TTL = 86400  # 24 hours
+CHUNK_COLUMNS = ('texts', 'translated', 'pages', 'scanned')
+
+# Output layout for reconstruct_translated_pdf
+RULE = "=" * 60
+HEADER_TEMPLATE = (
+    RULE + "\n"
+    "PRISMY Translation Result\n"
+    + RULE + "\n"
+    "Job ID: {job_id}\n"
+    "Source Language: {source_lang}\n"
+    "Target Language: {target_lang}\n"
+    "Translation Tier: {tier}\n"
+    "Total Pages: {total_pages}\n"
+    + RULE + "\n\n"
+)
+PAGE_TEMPLATE = "\n" + "=" * 20 + " Page {page} " + "=" * 20 + "\n"
+OCR_NOTE = "[Note: This page was processed with OCR]\n"
+CHUNK_TEMPLATE = (
+    "Original:\n"
+    + "-" * 40 + "\n"
+    "{original}\n\n"
+    "Translation:\n"
+    + "-" * 40 + "\n"
+    "{translated}\n\n"
+    + RULE + "\n\n"
+)
+
+# Content-addressed translation cache shared across jobs
+TRANSLATION_CACHE_TTL = 7 * 86400  # 7 days
+
+# Chunks must contain a letter to be worth translating; digits and '_' don't count
+HAS_LETTER_RE = re.compile(r'[^\W\d_]')
+
 class PDFProcessorTask(Task):
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         job_id = args[0]
@@ -25,9 +66,7 @@ def extract_pdf_chunks(file_path: str, chunk_size: int = 1000) -> List[Dict]:
     doc = fitz.open(file_path)
     all_chunks = []
     
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        
+    for page_num, page in enumerate(doc.pages()):
         # Extract content with OCR if needed
         page_content = extractor.extract_page_content(page, page_num)
         
@@ -50,61 +89,89 @@ def translate_chunk(text: str, source_lang: str, target_lang: str, tier: str) ->
     """Use real translation API"""
     return translate_with_tier(text, source_lang, target_lang, tier)
 
+def translate_chunks_batch(texts: List[str], source_lang: str, target_lang: str, tier: str) -> List[str]:
+    """Translate several chunks with as few API requests as possible"""
+    return translate_batch_with_tier(texts, source_lang, target_lang, tier)
+
+def translation_cache_key(text: str, target_lang: str, tier: str) -> str:
+    """Cache key for a translated text: tl:{tier}:{target}:{sha1(text)}"""
+    return f"tl:{tier}:{target_lang}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+def translate_with_cache(texts: List[str], options: Dict, pipe) -> List[str]:
+    """Translate a batch of chunks, serving repeats from the cache and queueing new entries on pipe"""
+    # Chunks without any letters (numbers-only, page numbers, punctuation) pass through
+    translations = [None if HAS_LETTER_RE.search(text) else text for text in texts]
+    pending = [i for i, translated in enumerate(translations) if translated is None]
+    if not pending:
+        return translations
+    
+    # Look up the pending chunks in the translation cache with one MGET
+    cache_keys = {i: translation_cache_key(texts[i], options['target_lang'], options['tier']) for i in pending}
+    cached = redis_client.mget([cache_keys[i] for i in pending])
+    misses = []
+    for i, value in zip(pending, cached):
+        if value is None:
+            misses.append(i)
+        else:
+            translations[i] = value
+    
+    # Translate only the misses
+    if misses:
+        fresh = translate_chunks_batch(
+            [texts[i] for i in misses],
+            options['source_lang'],
+            options['target_lang'],
+            options['tier']
+        )
+        for i, translated in zip(misses, fresh):
+            translations[i] = translated
+            if not translated.startswith('[Error'):
+                pipe.set(cache_keys[i], translated, ex=TRANSLATION_CACHE_TTL)
+    
+    return translations
+
 def reconstruct_translated_pdf(job_id: str, original_path: str) -> str:
     """Create output with translations"""
     output_path = f"/tmp/translated_{job_id}.txt"
     
-    # Get all chunks
-    chunks = []
-    i = 0
-    while True:
-        chunk_data = redis_client.get(f"job:{job_id}:chunk:{i}")
-        if not chunk_data:
-            break
-        chunks.append(json.loads(chunk_data))
-        i += 1
-    
-    # Get job info
-    job_info = redis_client.hgetall(f"job:{job_id}")
+    # Get chunk columns and job info in a single pipelined round-trip
+    pipe = redis_client.pipeline(transaction=False)
+    for column in CHUNK_COLUMNS:
+        pipe.lrange(f"job:{job_id}:{column}", 0, -1)
+    pipe.hmget(f"job:{job_id}", "source_lang", "target_lang", "tier")
+    texts, translations, page_nums, scanned, (source_lang, target_lang, tier) = pipe.execute()
     
     # Group by page
     pages = {}
-    for chunk in chunks:
-        page_num = chunk['page_num']
+    scanned_pages = set()
+    for text, translated, page_num, is_scanned in zip(texts, translations, page_nums, scanned):
+        page_num = int(page_num)
         if page_num not in pages:
             pages[page_num] = []
-        pages[page_num].append(chunk)
+            if is_scanned == '1':
+                scanned_pages.add(page_num)
+        pages[page_num].append((text, translated))
     
-    # Write formatted output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("="*60 + "\n")
-        f.write("PRISMY Translation Result\n")
-        f.write("="*60 + "\n")
-        f.write(f"Job ID: {job_id}\n")
-        f.write(f"Source Language: {job_info.get('source_lang', 'auto')}\n")
-        f.write(f"Target Language: {job_info.get('target_lang', 'unknown')}\n")
-        f.write(f"Translation Tier: {job_info.get('tier', 'unknown').upper()}\n")
-        f.write(f"Total Pages: {len(pages)}\n")
-        f.write("="*60 + "\n\n")
+    # Build formatted output and write it in one call
+    parts = [HEADER_TEMPLATE.format(
+        job_id=job_id,
+        source_lang=source_lang or 'auto',
+        target_lang=target_lang or 'unknown',
+        tier=(tier or 'unknown').upper(),
+        total_pages=len(pages)
+    )]
+    
+    for page_num in sorted(pages.keys()):
+        parts.append(PAGE_TEMPLATE.format(page=page_num + 1))
+        if page_num in scanned_pages:
+            parts.append(OCR_NOTE)
+        parts.append("\n")
         
-        for page_num in sorted(pages.keys()):
-            f.write(f"\n{'='*20} Page {page_num + 1} {'='*20}\n")
-            if pages[page_num][0].get('is_scanned'):
-                f.write("[Note: This page was processed with OCR]\n")
-            f.write("\n")
-            
-            # Write original and translation
-            for chunk in pages[page_num]:
-                # Original
-                f.write("Original:\n")
-                f.write("-" * 40 + "\n")
-                f.write(chunk['text'] + "\n\n")
-                
-                # Translation
-                f.write("Translation:\n")
-                f.write("-" * 40 + "\n")
-                f.write(chunk['translated'] + "\n\n")
-                f.write("="*60 + "\n\n")
+        # Original and translation
+        for text, translated in pages[page_num]:
+            parts.append(CHUNK_TEMPLATE.format(original=text, translated=translated))
+    
+    Path(output_path).write_text(''.join(parts), encoding='utf-8')
     
     return output_path
 
@@ -126,37 +193,46 @@ def process_pdf_translation(self, job_id: str, file_path: str, options: Dict):
         chunks = extract_pdf_chunks(file_path, options.get('chunk_size', 1000))
         total_chunks = len(chunks)
         
-        # Store metadata
-        redis_client.hset(f"job:{job_id}", mapping={
+        # Store metadata and the source chunk columns (reset first in case of retry)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(f"job:{job_id}", mapping={
             "total_chunks": total_chunks,
             "total_pages": chunks[-1]['page_num'] + 1 if chunks else 0
         })
+        pipe.delete(*[f"job:{job_id}:{column}" for column in CHUNK_COLUMNS])
+        if chunks:
+            pipe.rpush(f"job:{job_id}:texts", *[chunk['text'] for chunk in chunks])
+            pipe.rpush(f"job:{job_id}:pages", *[chunk['page_num'] for chunk in chunks])
+            pipe.rpush(f"job:{job_id}:scanned", *['1' if chunk['is_scanned'] else '0' for chunk in chunks])
+            for column in ('texts', 'pages', 'scanned'):
+                pipe.expire(f"job:{job_id}:{column}", CHUNK_TTL)
+        pipe.execute()
         
-        # Process each chunk
-        for i, chunk in enumerate(chunks):
-            chunk_key = f"job:{job_id}:chunk:{i}"
+        # Nothing to translate when the source already is the target language
+        passthrough = options['source_lang'] != 'auto' and options['source_lang'] == options['target_lang']
+        
+        # Translate chunks in batches, pipelining each batch's Redis writes
+        last_progress = 0
+        for start in range(0, total_chunks, CHUNK_BATCH_SIZE):
+            batch = chunks[start:start + CHUNK_BATCH_SIZE]
+            texts = [chunk['text'] for chunk in batch]
+            
+            if passthrough:
+                translations = texts
+            else:
+                translations = translate_with_cache(texts, options, pipe)
             
-            # Translate chunk
-            translated = translate_chunk(
-                chunk['text'], 
-                options['source_lang'],
-                options['target_lang'],
-                options['tier']
-            )
+            # Append results to the translated column
+            pipe.rpush(f"job:{job_id}:translated", *translations)
+            pipe.expire(f"job:{job_id}:translated", CHUNK_TTL)
             
-            # Store result with metadata
-            redis_client.setex(
-                chunk_key,
-                86400,  # 24 hours TTL
-                json.dumps({
-                    **chunk,
-                    'translated': translated
-                })
-            )
+            # Update progress in PROGRESS_STEP increments
+            progress = int((start + len(batch)) / total_chunks * 100)
+            if progress - last_progress >= PROGRESS_STEP:
+                pipe.hset(f"job:{job_id}", "progress", progress)
+                last_progress = progress
             
-            # Update progress
-            progress = int((i + 1) / total_chunks * 100)
-            redis_client.hset(f"job:{job_id}", "progress", progress)
+            pipe.execute()
         
         # Create output
         output_path = reconstruct_translated_pdf(job_id, file_path)
@@ -2,7 +2,10 @@ import os
 import json
 import logging
 import asyncio
-from typing import Dict, List, Optional, Tuple
+import collections
+import codecs
+import functools
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from celery_app import app as celery_app
 import redis
 import PyPDF2
@@ -11,23 +14,41 @@ from PIL import Image
 import pytesseract
 import io
 import re
+import time
+import hashlib
+import mmap
 from datetime import datetime
+from dataclasses import dataclass, asdict
 
 # Import từ local modules
 from src.services.storage_service import StorageService
-from src.services.queue.redis_client import get_redis_client
+from src.services.queue.redis_client import get_redis_client, transition_job_status, OUTPUT_KEY_PREFIX
 from src.core.models import TranslationJob, JobStatus, TranslationTier
 from src.core.config import settings
+from src.utils.page_pool import page_pool_workers, run_page_ranges, threadsafe_mp_context
 
 # ============ THÊM MỚI: Import DOCX và FileExtractor ============
 try:
     from docx import Document
+    from lxml import etree
     import zipfile
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
     logging.warning("python-docx not installed. DOCX support disabled.")
 
+try:
+    import charset_normalizer
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure Celery
 celery_app.conf.update(
     task_serializer='json',
@@ -41,9 +62,54 @@ celery_app.conf.update(
 )
 
 logger = logging.getLogger(__name__)
+
+# Job status strings, resolved once instead of per progress update
+STATUS_PROCESSING = JobStatus.PROCESSING.value
+STATUS_COMPLETED = JobStatus.COMPLETED.value
+STATUS_FAILED = JobStatus.FAILED.value
+
+# Media types recorded with the output so downloads need no lookup
+OUTPUT_MEDIA_TYPES = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.pdf': 'application/pdf',
+}
+
+# Sentence boundaries used when a paragraph exceeds the chunk size
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Rendered outputs up to this size are also kept in Redis for downloads
+OUTPUT_REDIS_MAX_BYTES = 8 * 1024 * 1024
+
+# Literal \uXXXX escapes left in translated text
+UNICODE_ESCAPE_RE = re.compile(r'\\u([0-9a-fA-F]{4})')
+
+# Maximum chunks in flight against the translation provider
+TRANSLATE_CONCURRENCY = 16
+
+# First-page text length above which a table-free PDF is extracted with PyPDF2 only
+PDF_PROBE_MIN_CHARS = 500
+PDF_STRATEGY_KEY_PREFIX = "prismy:pdfstrategy:"
+PDF_STRATEGY_TTL = 7 * 86400  # 7 days
+PDF_FINGERPRINT_BYTES = 1024 * 1024
+
+# PDFs up to this many pages are extracted serially: below this, starting the pool
+# and re-parsing the PDF in every worker costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 8
+
 storage_service = StorageService()
 redis_client = get_redis_client()
 
+# JSON codec for the large result fields; orjson emits UTF-8 bytes directly
+if ORJSON_AVAILABLE:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+else:
+    def _dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False).encode('utf-8')
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
 # ============================================
 # HELPER FUNCTIONS FOR REDIS HASH OPERATIONS
 # ============================================
@@ -59,8 +125,8 @@ def get_job_data(job_id: str) -> Dict:
         for key in ['extraction_result', 'translation_result']:
             if key in job_data and job_data[key]:
                 try:
-                    job_data[key] = json.loads(job_data[key])
-                except json.JSONDecodeError:
+                    job_data[key] = _loads(job_data[key])
+                except _JSONDecodeError:
                     pass
         
         return job_data
@@ -68,25 +134,35 @@ def get_job_data(job_id: str) -> Dict:
         logger.error(f"Error getting job data for {job_id}: {e}")
         raise
 
-def update_job_data(job_id: str, updates: Dict) -> None:
+def update_job_data(job_id: str, updates: Dict, expire: bool = True) -> None:
     """Update job data in Redis hash với Unicode handling"""
     try:
         # Prepare updates for Redis hash
         redis_updates = {}
         for key, value in updates.items():
             if isinstance(value, (dict, list)):
-                redis_updates[key] = json.dumps(value, ensure_ascii=False)
+                redis_updates[key] = _dumps(value)
             else:
                 redis_updates[key] = str(value)
         
         # Add timestamp
         redis_updates['updated_at'] = datetime.utcnow().isoformat()
         
-        # Update Redis hash
-        redis_client.hset(f"prismy:job:{job_id}", mapping=redis_updates)
+        # Status changes go through the transition script, which skips expired jobs
+        status = redis_updates.pop('status', None)
+        if status is not None:
+            transition_job_status(redis_client, job_id, status, redis_updates)
+            return
         
-        # Set expiration (24 hours)
-        redis_client.expire(f"prismy:job:{job_id}", 86400)
+        # Update Redis hash and its expiration (24 hours) in one round-trip
+        key = f"prismy:job:{job_id}"
+        if not expire:
+            redis_client.hset(key, mapping=redis_updates)
+            return
+        with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=redis_updates)
+            pipe.expire(key, 86400)
+            pipe.execute()
         
     except Exception as e:
         logger.error(f"Error updating job data for {job_id}: {e}")
@@ -106,62 +182,87 @@ def update_job_progress(job_id: str, status: str, progress: int, message: str =
 def mark_job_failed(job_id: str, error: str) -> None:
     """Mark job as failed with error message"""
     update_job_data(job_id, {
-        'status': JobStatus.FAILED.value,
+        'status': STATUS_FAILED,
         'error': error,
         'progress': 0
     })
 
+class JobProgressWriter:
+    """Buffer job updates and write them in one round-trip per flush
+    
+    Call flush() at step boundaries; maybe_flush() writes only if
+    min_interval seconds have passed, for updates inside hot loops.
+    The TTL is refreshed on the first flush only.
+    """
+    
+    def __init__(self, job_id: str, min_interval: float = 1.0):
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._buffer = {}
+        self._expire_set = False
+        self._last_flush = 0.0
+    
+    def update(self, field: str, value) -> None:
+        self._buffer[field] = value
+    
+    def update_progress(self, status: str, progress: int, message: str = None) -> None:
+        self._buffer['status'] = status
+        self._buffer['progress'] = progress
+        if message:
+            self._buffer['message'] = message
+    
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.min_interval:
+            self.flush()
+    
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        updates, self._buffer = self._buffer, {}
+        update_job_data(self.job_id, updates, expire=not self._expire_set)
+        self._expire_set = True
+        self._last_flush = time.monotonic()
+
 # ============ CẬP NHẬT: File Type Detector ============
 class FileTypeDetector:
     """Phát hiện chính xác loại file"""
     
+    # Extension quyết định trước; magic bytes chỉ đọc khi extension không rõ
+    EXTENSION_TYPES = {
+        '.docx': 'docx',
+        '.pdf': 'pdf',
+        '.txt': 'txt',
+        '.md': 'txt',
+        '.text': 'txt',
+    }
+    HEADER_SIZE = 100
+    
     @staticmethod
     def detect_file_type(file_path: str) -> str:
         """Phát hiện loại file thực tế từ file path và extension"""
         try:
-            if not os.path.exists(file_path):
-                logger.error(f"File không tồn tại: {file_path}")
-                return 'unknown'
-            
-            # Lấy extension từ file path
-            from pathlib import Path
-            ext = Path(file_path).suffix.lower()
-            
+            stat = os.stat(file_path)
+        except OSError:
+            logger.error(f"File không tồn tại: {file_path}")
+            return 'unknown'
+        return FileTypeDetector._detect_cached(file_path, stat.st_mtime_ns, stat.st_size)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _detect_cached(file_path: str, mtime_ns: int, size: int) -> str:
+        """Detection keyed by (path, mtime, size) so unchanged files are never re-read"""
+        try:
             # Ưu tiên extension trước
-            if ext == '.docx':
-                # Kiểm tra thêm bằng ZIP header
-                try:
-                    with open(file_path, 'rb') as f:
-                        header = f.read(4)
-                    if header.startswith(b'PK\x03\x04'):
-                        logger.info(f"Detected DOCX from extension and header: {file_path}")
-                        return 'docx'
-                except:
-                    pass
-                logger.info(f"Detected DOCX from extension: {file_path}")
-                return 'docx'
-            
-            elif ext == '.pdf':
-                # Kiểm tra PDF header
-                try:
-                    with open(file_path, 'rb') as f:
-                        header = f.read(8)
-                    if header.startswith(b'%PDF-'):
-                        logger.info(f"Detected PDF from extension and header: {file_path}")
-                        return 'pdf'
-                except:
-                    pass
-                logger.info(f"Detected PDF from extension: {file_path}")
-                return 'pdf'
+            ext = os.path.splitext(file_path)[1].lower()
+            file_type = FileTypeDetector.EXTENSION_TYPES.get(ext)
+            if file_type:
+                logger.info(f"Detected {file_type.upper()} from extension: {file_path}")
+                return file_type
             
-            elif ext in ['.txt', '.md', '.text']:
-                logger.info(f"Detected TEXT from extension: {file_path}")
-                return 'txt'
-            
-            # Nếu không có extension rõ ràng, đọc header
+            # Nếu không có extension rõ ràng, đọc header một lần
             try:
                 with open(file_path, 'rb') as f:
-                    header = f.read(8)
+                    header = f.read(FileTypeDetector.HEADER_SIZE)
                 
                 # PDF check
                 if header.startswith(b'%PDF-'):
@@ -172,13 +273,12 @@ class FileTypeDetector:
                 if header.startswith(b'PK\x03\x04'):
                     return FileTypeDetector._check_docx(file_path)
                 
-                # Text files
+                # Text files; the incremental decoder tolerates a character cut at the boundary
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        f.read(100)
+                    codecs.getincrementaldecoder('utf-8')().decode(header)
                     logger.info(f"Detected TEXT from content: {file_path}")
                     return 'txt'
-                except:
+                except UnicodeDecodeError:
                     pass
                 
             except Exception as e:
@@ -197,22 +297,61 @@ class FileTypeDetector:
         try:
             import zipfile
             with zipfile.ZipFile(file_path, 'r') as zip_file:
-                contents = zip_file.namelist()
-                if 'word/document.xml' in contents:
-                    logger.info(f"Confirmed DOCX structure: {file_path}")
-                    return 'docx'
-            logger.warning(f"ZIP file but not DOCX: {file_path}")
-            return 'unknown'
+                # Dict lookup against the central directory, no name list built
+                try:
+                    zip_file.getinfo('word/document.xml')
+                except KeyError:
+                    logger.warning(f"ZIP file but not DOCX: {file_path}")
+                    return 'unknown'
+            logger.info(f"Confirmed DOCX structure: {file_path}")
+            return 'docx'
         except Exception as e:
             logger.error(f"Error checking DOCX structure: {e}")
             return 'unknown'
 
 # ============ THÊM MỚI: DOCX Processor ============
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W_NS + 'body'
+_W_P = _W_NS + 'p'
+_W_TBL = _W_NS + 'tbl'
+_W_TR = _W_NS + 'tr'
+_W_TC = _W_NS + 'tc'
+_W_T = _W_NS + 't'
+_W_TAB = _W_NS + 'tab'
+_W_BR = _W_NS + 'br'
+_W_CR = _W_NS + 'cr'
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Text of a <w:p> the way python-docx renders it (tabs and breaks included)"""
+    parts = []
+    for node in paragraph.iter(_W_T, _W_TAB, _W_BR, _W_CR):
+        if node.tag == _W_T:
+            parts.append(node.text or '')
+        elif node.tag == _W_TAB:
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+def _docx_table_text(table) -> str:
+    """Text of a <w:tbl>: cells tab-separated, rows newline-separated"""
+    rows = []
+    for row in table.iterchildren(_W_TR):
+        cells = [
+            '\n'.join(_docx_paragraph_text(p) for p in cell.iterchildren(_W_P)).strip()
+            for cell in row.iterchildren(_W_TC)
+        ]
+        rows.append('\t'.join(cells))
+    return '\n'.join(rows)
+
 class DocxProcessor:
     """Xử lý file DOCX"""
     
-    def __init__(self):
+    def __init__(self, use_python_docx: bool = False):
         self.name = "DocxProcessor"
+        # python-docx repeats merged cells like Word does; the default
+        # streaming parser is faster but reports each <w:tc> once
+        self.use_python_docx = use_python_docx
     
     def process_docx(self, file_path: str) -> Dict:
         """Xử lý file DOCX và trả về dữ liệu có cấu trúc"""
@@ -222,17 +361,24 @@ class DocxProcessor:
             raise ImportError("python-docx not installed. Run: pip install python-docx")
         
         try:
+            # Đọc file một lần; validation và python-docx dùng chung buffer
+            with open(file_path, 'rb') as f:
+                buffer = io.BytesIO(f.read())
+            
             # Kiểm tra file DOCX hợp lệ
-            if not self._is_valid_docx(file_path):
+            if not self._is_valid_docx(buffer):
                 raise ValueError(f"Invalid DOCX file: {file_path}")
             
-            # Trích xuất bằng python-docx
-            doc = Document(file_path)
+            buffer.seek(0)
+            if self.use_python_docx:
+                paragraphs, tables = self._extract_python_docx(buffer)
+            else:
+                paragraphs, tables = self._extract_iterparse(buffer)
             pages_data = []
             
             # Trích xuất paragraphs
-            for i, paragraph in enumerate(doc.paragraphs):
-                text = paragraph.text.strip()
+            for i, text in enumerate(paragraphs):
+                text = text.strip()
                 if text:
                     pages_data.append({
                         'page': 1,  # DOCX không có page concept rõ ràng
@@ -243,8 +389,7 @@ class DocxProcessor:
                     })
             
             # Trích xuất tables
-            for table_idx, table in enumerate(doc.tables):
-                table_text = self._extract_table_text(table)
+            for table_idx, table_text in enumerate(tables):
                 if table_text.strip():
                     pages_data.append({
                         'page': 1,
@@ -274,18 +419,49 @@ class DocxProcessor:
             logger.error(f"DOCX processing error: {e}")
             raise
     
-    def _is_valid_docx(self, file_path: str) -> bool:
-        """Kiểm tra DOCX hợp lệ"""
+    def _is_valid_docx(self, file) -> bool:
+        """Kiểm tra DOCX hợp lệ (path hoặc file object)"""
         try:
             import zipfile
-            with zipfile.ZipFile(file_path, 'r') as zip_file:
-                required_files = ['word/document.xml', '[Content_Types].xml']
-                zip_contents = zip_file.namelist()
-                return all(req in zip_contents for req in required_files)
+            with zipfile.ZipFile(file, 'r') as zip_file:
+                try:
+                    zip_file.getinfo('word/document.xml')
+                    zip_file.getinfo('[Content_Types].xml')
+                except KeyError:
+                    return False
+                return True
         except Exception as e:
             logger.error(f"DOCX validation error: {e}")
             return False
     
+    def _extract_iterparse(self, file) -> Tuple[List[str], List[str]]:
+        """Stream word/document.xml, collecting top-level paragraph and table text"""
+        paragraphs = []
+        tables = []
+        with zipfile.ZipFile(file, 'r') as zip_file:
+            with zip_file.open('word/document.xml') as xml:
+                for _, elem in etree.iterparse(xml, events=('end',), tag=(_W_P, _W_TBL)):
+                    parent = elem.getparent()
+                    # Paragraphs inside tables are read with their table
+                    if parent is None or parent.tag != _W_BODY:
+                        continue
+                    if elem.tag == _W_P:
+                        paragraphs.append(_docx_paragraph_text(elem))
+                    else:
+                        tables.append(_docx_table_text(elem))
+                    # Free processed body children to keep memory bounded
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+        return paragraphs, tables
+    
+    def _extract_python_docx(self, file) -> Tuple[List[str], List[str]]:
+        """Trích xuất bằng python-docx"""
+        doc = Document(file)
+        paragraphs = [paragraph.text for paragraph in doc.paragraphs]
+        tables = [self._extract_table_text(table) for table in doc.tables]
+        return paragraphs, tables
+    
     def _extract_table_text(self, table) -> str:
         """Trích xuất text từ table"""
         table_text = []
@@ -332,30 +508,23 @@ class PDFProcessor:
         pages_data = []
         try:
             with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    # Extract text
-                    text = page.extract_text()
-                    
-                    # Extract tables
-                    tables = page.extract_tables()
-                    table_text = ""
-                    
-                    if tables:
-                        for table in tables:
-                            for row in table:
-                                if row:
-                                    table_text += " | ".join([str(cell) if cell else "" for cell in row]) + "\n"
-                    
-                    combined_text = f"{text or ''}\n{table_text}".strip()
-                    
-                    if combined_text and len(combined_text) > self.min_text_length:
-                        pages_data.append({
-                            'page': page_num + 1,
-                            'text': combined_text,
-                            'method': 'pdfplumber',
-                            'element_type': 'page',
-                            'has_tables': bool(tables)
-                        })
+                total_pages = len(pdf.pages)
+                
+                # Small PDFs stay serial on the already-open document
+                workers = page_pool_workers(total_pages, PDF_PARALLEL_MIN_PAGES)
+                if not workers:
+                    for page_num, page in enumerate(pdf.pages):
+                        page_data = _pdfplumber_page_data(page, page_num, self.min_text_length)
+                        if page_data:
+                            pages_data.append(page_data)
+                    return pages_data
+            
+            # The streaming pipeline extracts in a worker thread next to the event loop,
+            # so the pool mustn't fork
+            pages_data = run_page_ranges(
+                functools.partial(_extract_pages_pdfplumber, file_path, min_text_length=self.min_text_length),
+                total_pages, workers, threadsafe_mp_context()
+            )
                         
         except Exception as e:
             logger.error(f"pdfplumber extraction error: {str(e)}")
@@ -366,14 +535,25 @@ class PDFProcessor:
         """Main PDF processing method with fallback strategies"""
         logger.info(f"Processing PDF: {file_path}")
         
-        # Try pdfplumber first (better for most cases)
-        pages_data = self.extract_text_pdfplumber(file_path)
+        # Commit to one extractor up front; text-dense PDFs without tables go to PyPDF2
+        strategy = self.choose_strategy(file_path)
         
-        # If not enough content, try PyPDF2
-        if not pages_data or sum(len(p['text']) for p in pages_data) < 100:
-            logger.info("Trying PyPDF2 extraction...")
-            pypdf2_pages = self.extract_text_pypdf2(file_path)
-            pages_data.extend(pypdf2_pages)
+        if strategy == 'pypdf2':
+            pages_data = self.extract_text_pypdf2(file_path)
+            
+            # If not enough content, fall back to pdfplumber
+            if not pages_data or sum(len(p['text']) for p in pages_data) < 100:
+                logger.info("Trying pdfplumber extraction...")
+                pages_data.extend(self.extract_text_pdfplumber(file_path))
+        else:
+            # Try pdfplumber first (better for most cases)
+            pages_data = self.extract_text_pdfplumber(file_path)
+            
+            # If not enough content, try PyPDF2
+            if not pages_data or sum(len(p['text']) for p in pages_data) < 100:
+                logger.info("Trying PyPDF2 extraction...")
+                pypdf2_pages = self.extract_text_pypdf2(file_path)
+                pages_data.extend(pypdf2_pages)
         
         # Merge and clean results
         final_pages = self._merge_pages_data(pages_data)
@@ -391,6 +571,40 @@ class PDFProcessor:
             'document_type': 'pdf'
         }
     
+    def choose_strategy(self, file_path: str) -> str:
+        """Probe the first page with pdfplumber and pick 'pypdf2' or 'pdfplumber'
+        
+        The decision is memoized in Redis by a cheap content fingerprint.
+        """
+        cache_key = None
+        try:
+            cache_key = f"{PDF_STRATEGY_KEY_PREFIX}{_pdf_fingerprint(file_path)}"
+            cached = redis_client.get(cache_key)
+            if cached:
+                return cached
+        except Exception as e:
+            logger.warning(f"PDF strategy cache unavailable: {e}")
+        
+        strategy = 'pdfplumber'
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                if pdf.pages:
+                    page = pdf.pages[0]
+                    text = page.extract_text() or ''
+                    if len(text) > PDF_PROBE_MIN_CHARS and not page.find_tables():
+                        strategy = 'pypdf2'
+        except Exception as e:
+            logger.warning(f"PDF probe failed, using pdfplumber: {e}")
+            return strategy
+        
+        logger.info(f"PDF extraction strategy: {strategy}")
+        if cache_key:
+            try:
+                redis_client.set(cache_key, strategy, ex=PDF_STRATEGY_TTL)
+            except Exception as e:
+                logger.warning(f"Could not cache PDF strategy: {e}")
+        return strategy
+    
     def _merge_pages_data(self, pages_data: List[Dict]) -> List[Dict]:
         """Merge and deduplicate pages data"""
         merged = {}
@@ -402,6 +616,58 @@ class PDFProcessor:
         
         return [merged[k] for k in sorted(merged.keys())]
 
+def _pdf_fingerprint(file_path: str) -> str:
+    """Size plus a hash of the first and last PDF_FINGERPRINT_BYTES of the file
+    
+    Re-uploads of the same file share a key without hashing the whole upload;
+    a wrong hit only picks the other extractor, which still falls back.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        digest.update(f.read(PDF_FINGERPRINT_BYTES))
+        if size > PDF_FINGERPRINT_BYTES:
+            f.seek(max(PDF_FINGERPRINT_BYTES, size - PDF_FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return f"{size}:{digest.hexdigest()}"
+
+def _pdfplumber_page_data(page, page_num: int, min_text_length: int) -> Optional[Dict]:
+    """Extract text and tables from one pdfplumber page"""
+    # Extract text
+    text = page.extract_text()
+    
+    # Extract tables
+    tables = page.extract_tables()
+    table_text = ""
+    
+    if tables:
+        for table in tables:
+            for row in table:
+                if row:
+                    table_text += " | ".join([str(cell) if cell else "" for cell in row]) + "\n"
+    
+    combined_text = f"{text or ''}\n{table_text}".strip()
+    
+    if combined_text and len(combined_text) > min_text_length:
+        return {
+            'page': page_num + 1,
+            'text': combined_text,
+            'method': 'pdfplumber',
+            'element_type': 'page',
+            'has_tables': bool(tables)
+        }
+    return None
+
+def _extract_pages_pdfplumber(file_path: str, page_range: range, min_text_length: int) -> List[Dict]:
+    """Process pool entry point: extract a contiguous range of pages"""
+    pages_data = []
+    with pdfplumber.open(file_path) as pdf:
+        for page_num in page_range:
+            page_data = _pdfplumber_page_data(pdf.pages[page_num], page_num, min_text_length)
+            if page_data:
+                pages_data.append(page_data)
+    return pages_data
+
 # ============ THÊM MỚI: Text Processor ============
 class TextProcessor:
     """Xử lý file text thuần"""
@@ -411,27 +677,13 @@ class TextProcessor:
         logger.info(f"Processing TEXT: {file_path}")
         
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    logger.info(f"Successfully read text file with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content is None:
-                raise ValueError("Could not decode text file with any encoding")
+            # Chia thành paragraphs
+            paragraphs, encoding = self._read_paragraphs(file_path)
+            logger.info(f"Successfully read text file with {encoding} encoding")
             
-            if not content.strip():
+            if not any(para.strip() for para in paragraphs):
                 raise ValueError("Text file is empty")
             
-            # Chia thành paragraphs
-            paragraphs = content.split('\n\n')
             pages_data = []
             
             for i, para in enumerate(paragraphs):
@@ -448,7 +700,7 @@ class TextProcessor:
                 # If no paragraphs, treat entire content as one element
                 pages_data.append({
                     'page': 1,
-                    'text': content.strip(),
+                    'text': '\n\n'.join(paragraphs).strip(),
                     'method': 'text_content',
                     'element_type': 'content'
                 })
@@ -458,7 +710,7 @@ class TextProcessor:
             return {
                 'pages': pages_data,
                 'total_pages': 1,
-                'total_characters': len(content),
+                'total_characters': sum(len(para) for para in paragraphs) + 2 * (len(paragraphs) - 1),
                 'extraction_methods': ['text'],
                 'document_type': 'txt'
             }
@@ -467,54 +719,129 @@ class TextProcessor:
             logger.error(f"Text processing error: {e}")
             raise
 
+    def _read_paragraphs(self, file_path: str) -> Tuple[List[str], str]:
+        """Split the file into paragraphs on blank lines, returning them with the encoding used
+        
+        UTF-8 files with LF line endings are scanned through an mmap and decoded
+        one paragraph at a time (b'\\n\\n' never occurs inside a multi-byte
+        sequence), so the raw bytes are never copied into memory whole. Files
+        containing CR and other encodings are decoded on the full buffer, with
+        CRLF and CR line endings normalized to LF as text mode would.
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return [''], 'utf-8'
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = len(codecs.BOM_UTF8) if mm[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+                has_cr = mm.find(b'\r', start) != -1
+                if not has_cr:
+                    try:
+                        return [mm[s:e].decode('utf-8') for s, e in _paragraph_spans(mm, start)], 'utf-8'
+                    except UnicodeDecodeError:
+                        pass
+                raw = mm[:]
+        
+        content = None
+        if has_cr:
+            try:
+                content = raw.decode('utf-8-sig')
+                encoding = 'utf-8'
+            except UnicodeDecodeError:
+                pass
+        if content is None and CHARSET_NORMALIZER_AVAILABLE:
+            best = charset_normalizer.from_bytes(raw).best()
+            if best is not None:
+                content = str(best)
+                encoding = best.encoding
+        if content is None:
+            content = raw.decode('latin-1')
+            encoding = 'latin-1'
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content.split('\n\n'), encoding
+
+def _paragraph_spans(buffer, start: int = 0) -> Iterator[Tuple[int, int]]:
+    """(start, end) byte offsets of the b'\\n\\n'-separated paragraphs in buffer
+    
+    Line endings must already be LF; _read_paragraphs routes CR files elsewhere.
+    """
+    end = buffer.find(b'\n\n', start)
+    while end != -1:
+        yield start, end
+        start = end + 2
+        end = buffer.find(b'\n\n', start)
+    yield start, len(buffer)
+
 # Initialize processors
 pdf_processor = PDFProcessor()
 docx_processor = DocxProcessor()
 text_processor = TextProcessor()
 
 # ============ CẬP NHẬT: Extract Text Task ============
+@dataclass(slots=True)
+class TextChunk:
+    """One extracted chunk; converted to a dict only at Celery task boundaries"""
+    page: int
+    text: str
+    method: str
+    chunk_index: int
+    element_type: str
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TextChunk':
+        return cls(
+            data.get('page', 1),
+            data['text'],
+            data.get('method', 'unknown'),
+            data.get('chunk_index', 0),
+            data.get('element_type', 'text')
+        )
+
+def iter_text_chunks(file_path: str, file_type: str = None,
+                     on_extracted: Optional[Callable[[int], None]] = None) -> Iterator[TextChunk]:
+    """Extract text from uploaded file with auto-detection, yielding chunks as pages are split
+    
+    on_extracted, if given, is called with the total text length once the file is extracted.
+    """
+    # Trust the provided type when it agrees with the extension, otherwise auto-detect
+    ext_type = FileTypeDetector.EXTENSION_TYPES.get(os.path.splitext(file_path)[1].lower())
+    if not file_type or file_type != ext_type:
+        detected_type = FileTypeDetector.detect_file_type(file_path)
+        if file_type != detected_type:
+            file_type = detected_type
+            logger.info(f"Using detected file type: {file_type}")
+    
+    # Process based on file type
+    if file_type == 'pdf':
+        extracted_data = pdf_processor.process_pdf(file_path)
+    elif file_type == 'docx':
+        if not DOCX_AVAILABLE:
+            raise ImportError("DOCX support not available. Install: pip install python-docx")
+        extracted_data = docx_processor.process_docx(file_path)
+    elif file_type in ['txt', 'text']:
+        extracted_data = text_processor.process_text(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    
+    if on_extracted is not None:
+        on_extracted(sum(len(page['text']) for page in extracted_data['pages']))
+    
+    # Format for translation - convert pages to chunks
+    for page in extracted_data['pages']:
+        chunks = _split_text_into_chunks(page['text'], max_chunk_size=1000)
+        element_type = page.get('element_type', 'text')
+        for chunk_idx, chunk in enumerate(chunks):
+            yield TextChunk(page['page'], chunk, page['method'], chunk_idx, element_type)
+
 @celery_app.task(name='prismy_tasks.extract_text')
 def extract_text(file_path: str, file_type: str = None) -> List[Dict]:
     """Extract text from uploaded file with auto-detection - Returns chunks directly"""
     try:
         logger.info(f"Starting extraction for {file_path}")
         
-        # Auto-detect file type if not provided or incorrect
-        detected_type = FileTypeDetector.detect_file_type(file_path)
-        
-        # Use detected type if provided type is wrong or missing
-        if not file_type or file_type == 'unknown' or file_type != detected_type:
-            file_type = detected_type
-            logger.info(f"Using detected file type: {file_type}")
-        
-        extracted_data = {}
-        
-        # Process based on file type
-        if file_type == 'pdf':
-            extracted_data = pdf_processor.process_pdf(file_path)
-        elif file_type == 'docx':
-            if not DOCX_AVAILABLE:
-                raise ImportError("DOCX support not available. Install: pip install python-docx")
-            extracted_data = docx_processor.process_docx(file_path)
-        elif file_type in ['txt', 'text']:
-            extracted_data = text_processor.process_text(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-        
-        # Format for translation - convert pages to chunks
-        text_chunks = []
-        for page in extracted_data['pages']:
-            chunks = _split_text_into_chunks(page['text'], max_chunk_size=1000)
-            for chunk_idx, chunk in enumerate(chunks):
-                text_chunks.append({
-                    'page': page['page'],
-                    'text': chunk,
-                    'method': page['method'],
-                    'chunk_index': chunk_idx,
-                    'element_type': page.get('element_type', 'text')
-                })
+        text_chunks = [asdict(chunk) for chunk in iter_text_chunks(file_path, file_type)]
         
-        logger.info(f"Extraction completed: {len(text_chunks)} chunks from {file_type}")
+        logger.info(f"Extraction completed: {len(text_chunks)} chunks from {file_path}")
         return text_chunks
         
     except Exception as e:
@@ -522,54 +849,114 @@ def extract_text(file_path: str, file_type: str = None) -> List[Dict]:
         raise
 
 def _split_text_into_chunks(text: str, max_chunk_size: int = 1000) -> List[str]:
-    """Split text into manageable chunks for translation"""
+    """Split text into manageable chunks for translation
+    
+    The open chunk is kept as a list of pieces with a running length and
+    joined once when it is emitted, so the cost stays linear in the text length.
+    """
     if len(text) <= max_chunk_size:
         return [text]
     
     chunks = []
+    parts = []
+    length = 0
     
-    # Split by paragraphs first
-    paragraphs = text.split('\n\n')
+    def emit() -> None:
+        chunk = ''.join(parts).strip()
+        if chunk:
+            chunks.append(chunk)
     
-    current_chunk = ""
-    for para in paragraphs:
-        if len(current_chunk) + len(para) + 2 < max_chunk_size:  # +2 for \n\n
-            if current_chunk:
-                current_chunk += "\n\n" + para
+    # Split by paragraphs first
+    for para in text.split('\n\n'):
+        if length + len(para) + 2 < max_chunk_size:  # +2 for \n\n
+            if length:
+                parts += ('\n\n', para)
+                length += len(para) + 2
             else:
-                current_chunk = para
+                parts, length = [para], len(para)
         else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
+            if length:
+                emit()
             
-            # If paragraph is too long, split by sentences
+            # If paragraph is too long, split by sentences joined with single spaces
             if len(para) > max_chunk_size:
-                sentences = re.split(r'(?<=[.!?])\s+', para)
-                sentence_chunk = ""
-                
-                for sentence in sentences:
-                    if len(sentence_chunk) + len(sentence) + 1 < max_chunk_size:
-                        if sentence_chunk:
-                            sentence_chunk += " " + sentence
+                parts, length = [], 0
+                for sentence in SENTENCE_BOUNDARY_RE.split(para):
+                    if length + len(sentence) + 1 < max_chunk_size:
+                        if length:
+                            parts += (' ', sentence)
+                            length += len(sentence) + 1
                         else:
-                            sentence_chunk = sentence
+                            parts, length = [sentence], len(sentence)
                     else:
-                        if sentence_chunk:
-                            chunks.append(sentence_chunk.strip())
-                        sentence_chunk = sentence
-                
-                if sentence_chunk:
-                    current_chunk = sentence_chunk
-                else:
-                    current_chunk = ""
+                        if length:
+                            emit()
+                        parts, length = [sentence], len(sentence)
             else:
-                current_chunk = para
+                parts, length = [para], len(para)
     
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if length:
+        emit()
     
     return chunks
 
+_translation_manager = None
+_translation_providers = {}
+
+def get_translation_provider(tier: str):
+    """Per-process provider for tier; reused across tasks so SDK clients keep their connection pools"""
+    global _translation_manager
+    provider = _translation_providers.get(tier)
+    if provider is None:
+        if _translation_manager is None:
+            # Imported lazily to avoid loading every provider SDK at worker import
+            from src.services.translation_manager import TranslationManager
+            _translation_manager = TranslationManager()
+        provider = _translation_providers[tier] = _translation_manager.get_provider(tier)
+    return provider
+
+async def _translate_one(provider, chunk: TextChunk, target_language: str, sem: asyncio.Semaphore) -> Dict:
+    """Translate one chunk into the translated-chunk dict, with the original text as fallback"""
+    async with sem:
+        try:
+            translated_text = await provider.translate(chunk.text, target_language, 'auto')
+        except Exception as e:
+            logger.error(f"Translation failed for chunk: {str(e)}")
+            translated_text = f"[Translation Error: {str(e)}] {chunk.text}"
+    
+    return {
+        'page': chunk.page,
+        'original': chunk.text,
+        'translated': translated_text,
+        'method': chunk.method,
+        'element_type': chunk.element_type
+    }
+
+async def translate_chunk_stream(provider, chunks: Iterator[TextChunk], target_language: str) -> AsyncIterator[Dict]:
+    """Translate chunks as they are pulled from chunks, yielding results in order
+    
+    At most TRANSLATE_CONCURRENCY translations are in flight. The source iterator
+    is advanced in a worker thread so extraction overlaps with network IO.
+    """
+    sem = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+    in_flight = collections.deque()
+    
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        in_flight.append(asyncio.ensure_future(_translate_one(provider, chunk, target_language, sem)))
+        if len(in_flight) >= TRANSLATE_CONCURRENCY:
+            yield await in_flight.popleft()
+    
+    while in_flight:
+        yield await in_flight.popleft()
+
+async def _translate_all(provider, chunks: List[TextChunk], target_language: str) -> List[Dict]:
+    """Translate chunks concurrently, bounded by TRANSLATE_CONCURRENCY"""
+    sem = asyncio.Semaphore(TRANSLATE_CONCURRENCY)
+    return await asyncio.gather(*(_translate_one(provider, chunk, target_language, sem) for chunk in chunks))
+
 # ============ CẬP NHẬT: Translate Chunks Task ============
 @celery_app.task(name='prismy_tasks.translate_chunks')
 def translate_chunks(extracted_chunks: List[Dict], target_language: str, tier: str, job_id: str) -> List[Dict]:
@@ -577,44 +964,11 @@ def translate_chunks(extracted_chunks: List[Dict], target_language: str, tier: s
     try:
         logger.info(f"Starting translation for job {job_id}: {len(extracted_chunks)} chunks to {target_language}")
         
-        # Import translation manager
-        from src.services.translation_manager import TranslationManager
-        translation_manager = TranslationManager()
-        provider = translation_manager.get_provider(tier)
+        provider = get_translation_provider(tier)
         
-        translated_chunks = []
-        total_chunks = len(extracted_chunks)
-        
-        # Translate each chunk
-        for i, chunk in enumerate(extracted_chunks):
-            try:
-                # Translate the chunk
-                translated_text = asyncio.run(
-                    provider.translate(chunk['text'], target_language, 'auto')
-                )
-                
-                translated_chunk = {
-                    'page': chunk.get('page', 1),
-                    'original': chunk['text'],
-                    'translated': translated_text,
-                    'method': chunk.get('method', 'unknown'),
-                    'element_type': chunk.get('element_type', 'text')
-                }
-                translated_chunks.append(translated_chunk)
-                
-                logger.info(f"Translated chunk {i+1}/{total_chunks}")
-                
-            except Exception as e:
-                logger.error(f"Translation failed for chunk {i+1}: {str(e)}")
-                # Add original text as fallback
-                translated_chunk = {
-                    'page': chunk.get('page', 1),
-                    'original': chunk['text'],
-                    'translated': f"[Translation Error: {str(e)}] {chunk['text']}",
-                    'method': chunk.get('method', 'unknown'),
-                    'element_type': chunk.get('element_type', 'text')
-                }
-                translated_chunks.append(translated_chunk)
+        # Translate all chunks concurrently on a single event loop
+        chunks = [TextChunk.from_dict(chunk) for chunk in extracted_chunks]
+        translated_chunks = asyncio.run(_translate_all(provider, chunks, target_language))
         
         logger.info(f"Translation completed for job {job_id}: {len(translated_chunks)} chunks")
         return translated_chunks
@@ -623,10 +977,101 @@ def translate_chunks(extracted_chunks: List[Dict], target_language: str, tier: s
         logger.error(f"Translation failed for job {job_id}: {str(e)}")
         raise
 
+def _unescape_unicode(match) -> str:
+    return chr(int(match.group(1), 16))
+
+def _translated_text(chunk: Dict) -> Optional[str]:
+    """Get translated text from a chunk với Unicode fix"""
+    translated_text = chunk.get('translated', chunk.get('original', chunk.get('text', '')))
+    
+    # Fix literal \uXXXX escapes only; other characters are left as UTF-8
+    if translated_text and isinstance(translated_text, str):
+        if '\\u' in translated_text:
+            translated_text = UNICODE_ESCAPE_RE.sub(_unescape_unicode, translated_text)
+        return translated_text
+    return None
+
+class TranslatedDocumentWriter:
+    """Write translated chunks to a text stream as they arrive
+    
+    Chunks must arrive in page order. Page headers are only written for
+    multi-page documents, so the first page is held back until a second
+    page shows up or the writer is finished. The stream is not closed.
+    """
+    
+    def __init__(self, file):
+        self._file = file
+        self._finished = False
+        self._file.write("TRANSLATED DOCUMENT\n" + "=" * 50 + "\n\n")
+        self._page = None
+        self._page_texts = 0
+        self._multi_page = False
+        self._held = []
+        self.chunk_count = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+    
+    def write(self, chunk: Dict) -> None:
+        page_num = chunk.get('page', 1)
+        text = _translated_text(chunk)
+        self.chunk_count += 1
+        
+        if self._page is None:
+            self._page = page_num
+        elif page_num != self._page:
+            if not self._multi_page:
+                # Second page seen: flush the held first page with its header
+                self._multi_page = True
+                self._start_page(self._page)
+                for held in self._held:
+                    self._write_text(held)
+                self._held = []
+            self._file.write("\n\n")
+            self._page = page_num
+            self._start_page(page_num)
+        
+        if text:
+            if self._multi_page:
+                self._write_text(text)
+            else:
+                self._held.append(text)
+    
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        if self._page is not None:
+            if not self._multi_page:
+                self._start_page(self._page)
+                for held in self._held:
+                    self._write_text(held)
+            self._file.write("\n\n")
+    
+    def _start_page(self, page_num: int) -> None:
+        if self._multi_page:
+            self._file.write(f"PAGE {page_num}\n" + "-" * 30 + "\n")
+        self._page_texts = 0
+    
+    def _write_text(self, text: str) -> None:
+        if self._page_texts:
+            self._file.write("\n\n")
+        self._file.write(text)
+        self._page_texts += 1
+
 # ============ CẬP NHẬT: Reconstruct Document Task ============
 @celery_app.task(name='prismy_tasks.reconstruct_document')
-def reconstruct_document(translated_chunks: List[Dict], job_id: str, output_format: str) -> str:
-    """Reconstruct translated document với Unicode fix"""
+def reconstruct_document(translated_chunks: List[Dict], job_id: str, output_format: str,
+                         persist_to_disk: bool = True) -> str:
+    """Reconstruct translated document với Unicode fix
+    
+    With persist_to_disk=False the output is only kept in Redis (see store_output),
+    as long as it fits OUTPUT_REDIS_MAX_BYTES. The fields locating the output
+    are recorded on the job.
+    """
     try:
         logger.info(f"Starting reconstruction for job {job_id}")
         
@@ -634,49 +1079,14 @@ def reconstruct_document(translated_chunks: List[Dict], job_id: str, output_form
             logger.warning("No chunks to reconstruct!")
             return _create_empty_file(job_id)
         
-        # Group chunks by page
-        pages = {}
-        for chunk in translated_chunks:
-            page_num = chunk.get('page', 1)
-            if page_num not in pages:
-                pages[page_num] = []
-            
-            # Get translated text với Unicode decode
-            translated_text = chunk.get('translated', chunk.get('original', chunk.get('text', '')))
-            
-            # Fix Unicode escape sequences
-            if translated_text and isinstance(translated_text, str):
-                try:
-                    # Try to decode Unicode escape sequences
-                    if '\\u' in translated_text:
-                        import codecs
-                        decoded_text = codecs.decode(translated_text, 'unicode_escape')
-                        translated_text = decoded_text
-                except Exception as e:
-                    logger.warning(f"Unicode decode failed for chunk: {e}")
-                
-                pages[page_num].append(translated_text)
-        
-        # Create output document
-        output_content = "TRANSLATED DOCUMENT\n"
-        output_content += "=" * 50 + "\n\n"
-        
-        for page_num in sorted(pages.keys()):
-            if len(pages) > 1:
-                output_content += f"PAGE {page_num}\n"
-                output_content += "-" * 30 + "\n"
-            
-            page_content = "\n\n".join(pages[page_num])
-            output_content += page_content + "\n\n"
-        
-        # Save output file với UTF-8 encoding
+        # Render through a spool; the writer expects chunks in page order
         output_filename = f"translated_{job_id}.txt"
-        output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
-        
-        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(output_content)
+        with OutputSpool(os.path.join(settings.OUTPUT_DIR, output_filename)) as spool:
+            with TranslatedDocumentWriter(spool) as writer:
+                for chunk in _chunks_in_page_order(translated_chunks):
+                    writer.write(chunk)
+            output_fields = store_spooled_output(job_id, spool, persist_to_disk)
+        update_job_data(job_id, output_fields)
         
         logger.info(f"Reconstruction completed for job {job_id}: {output_filename}")
         return output_filename
@@ -685,6 +1095,95 @@ def reconstruct_document(translated_chunks: List[Dict], job_id: str, output_form
         logger.error(f"Reconstruction failed for job {job_id}: {str(e)}")
         raise
 
+def _chunks_in_page_order(chunks: List[Dict]) -> List[Dict]:
+    """Order chunks by page with a bucket per page number instead of a sort"""
+    max_page = max(chunk.get('page', 1) for chunk in chunks)
+    if max_page <= 1:
+        # Single-page documents (DOCX, TXT) are already in order
+        return chunks
+    
+    pages = [[] for _ in range(max_page + 1)]
+    for chunk in chunks:
+        pages[chunk.get('page', 1)].append(chunk)
+    return [chunk for page in pages for chunk in page]
+
+def store_output(job_id: str, output_filename: str, data: bytes, persist_to_disk: bool = True) -> Dict:
+    """Store rendered output in Redis and/or OUTPUT_DIR, returning the job fields that locate it
+    
+    Outputs up to OUTPUT_REDIS_MAX_BYTES go to Redis so downloads skip the disk.
+    Larger outputs are always written to disk.
+    """
+    fields = {'output_file': output_filename}
+    
+    if len(data) <= OUTPUT_REDIS_MAX_BYTES:
+        redis_client.set(f"{OUTPUT_KEY_PREFIX}{job_id}", data, ex=86400)
+        fields['output_storage'] = 'redis'
+    elif not persist_to_disk:
+        logger.info(f"Output for job {job_id} is {len(data)} bytes, writing to disk instead of Redis")
+        persist_to_disk = True
+    
+    if persist_to_disk:
+        output_path = os.path.join(settings.OUTPUT_DIR, output_filename)
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        fields['output_path'] = os.path.abspath(output_path)
+    
+    return fields
+
+class OutputSpool:
+    """UTF-8 text sink for a rendered output
+    
+    Output stays in memory while it fits OUTPUT_REDIS_MAX_BYTES and is spilled
+    to a .part file next to output_path past that, so large outputs are never
+    held in memory whole. The .part file is removed if it was not committed.
+    """
+    
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self._part_path = output_path + '.part'
+        self._buffer = io.BytesIO()
+        self._file = None
+        self.size = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+            os.remove(self._part_path)
+    
+    def write(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self.size += len(data)
+        if self._file is None and self.size > OUTPUT_REDIS_MAX_BYTES:
+            os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+            self._file = open(self._part_path, 'wb')
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._buffer if self._file is None else self._file).write(data)
+    
+    def getvalue(self) -> Optional[bytes]:
+        """Rendered bytes, or None once the output has spilled to disk"""
+        return None if self._buffer is None else self._buffer.getvalue()
+    
+    def commit(self) -> str:
+        """Move the spilled output to output_path and return its absolute path"""
+        self._file.close()
+        os.replace(self._part_path, self.output_path)
+        return os.path.abspath(self.output_path)
+
+def store_spooled_output(job_id: str, spool: OutputSpool, persist_to_disk: bool = True) -> Dict:
+    """store_output for a spool: in-memory outputs go through store_output, spilled ones are moved into place"""
+    output_filename = os.path.basename(spool.output_path)
+    data = spool.getvalue()
+    if data is not None:
+        return store_output(job_id, output_filename, data, persist_to_disk)
+    
+    logger.info(f"Output for job {job_id} is {spool.size} bytes, writing to disk instead of Redis")
+    return {'output_file': output_filename, 'output_path': spool.commit()}
+
 def _create_empty_file(job_id: str) -> str:
     """Create empty file when no content"""
     output_filename = f"translated_{job_id}.txt"
@@ -697,6 +1196,30 @@ def _create_empty_file(job_id: str) -> str:
     
     return output_filename
 
+async def _stream_translation(provider, file_path: str, file_type: str, target_lang: str,
+                              output, progress: JobProgressWriter) -> int:
+    """Run the streaming pipeline into the output stream and return the number of chunks written
+    
+    Progress moves from 10 to 95 with the share of extracted text translated so far.
+    """
+    text_length = 0
+    translated_length = 0
+    
+    def set_text_length(length: int) -> None:
+        nonlocal text_length
+        text_length = length
+    
+    chunks = iter_text_chunks(file_path, file_type, on_extracted=set_text_length)
+    with TranslatedDocumentWriter(output) as writer:
+        async for translated_chunk in translate_chunk_stream(provider, chunks, target_lang):
+            writer.write(translated_chunk)
+            translated_length += len(translated_chunk['original'])
+            if text_length:
+                progress.update('progress', max(10, min(95, 10 + 85 * translated_length // text_length)))
+            progress.update('message', f"Translated {writer.chunk_count} chunks")
+            progress.maybe_flush()
+    return writer.chunk_count
+
 # ============ FIXED: Process Translation Task - NO .get() CALLS ============
 @celery_app.task(name='prismy_tasks.process_translation_sync')
 def process_translation_sync(job_id: str, file_path: str, file_type: str, target_lang: str, tier: str) -> str:
@@ -709,54 +1232,35 @@ def process_translation_sync(job_id: str, file_path: str, file_type: str, target
         logger.info(f"📁 File: {file_path}")
         logger.info(f"🎯 File type: {file_type} → Translation: {target_lang}, Tier: {tier}")
         
-        update_job_progress(job_id, JobStatus.PROCESSING.value, 10, "Starting translation...")
+        progress = JobProgressWriter(job_id)
+        progress.update_progress(STATUS_PROCESSING, 10, "Starting translation...")
+        progress.flush()
         
-        # Step 1: Extract text directly
-        logger.info(f"📖 Step 1: Extracting text from file...")
+        # Extract → translate → reconstruct as one streaming pipeline: chunks are
+        # translated as they are extracted and written as soon as they come back
+        logger.info(f"🔄 Extracting, translating and reconstructing in one pass...")
         try:
-            extracted_chunks = extract_text(file_path, file_type)
-            
-            if not extracted_chunks:
-                raise ValueError("No content extracted from file")
+            provider = get_translation_provider(tier)
             
-            logger.info(f"✅ Extraction completed: {len(extracted_chunks)} chunks")
-            update_job_progress(job_id, JobStatus.PROCESSING.value, 40, f"Extracted {len(extracted_chunks)} chunks")
-            
-        except Exception as e:
-            logger.error(f"❌ Extraction failed: {str(e)}")
-            raise
-        
-        # Step 2: Translate chunks directly
-        logger.info(f"🔄 Step 2: Translating {len(extracted_chunks)} chunks...")
-        try:
-            translated_chunks = translate_chunks(extracted_chunks, target_lang, tier, job_id)
-            
-            if not translated_chunks:
-                raise ValueError("Translation failed - no results")
-            
-            logger.info(f"✅ Translation completed: {len(translated_chunks)} chunks")
-            update_job_progress(job_id, JobStatus.PROCESSING.value, 80, "Translation completed")
-            
-        except Exception as e:
-            logger.error(f"❌ Translation failed: {str(e)}")
-            raise
-        
-        # Step 3: Reconstruct document directly
-        logger.info(f"📄 Step 3: Reconstructing document...")
-        try:
-            output_filename = reconstruct_document(translated_chunks, job_id, 'txt')
-            
-            if not output_filename:
-                raise ValueError("Document reconstruction failed")
+            output_filename = f"translated_{job_id}.txt"
+            with OutputSpool(os.path.join(settings.OUTPUT_DIR, output_filename)) as spool:
+                chunk_count = asyncio.run(_stream_translation(provider, file_path, file_type, target_lang, spool, progress))
+                
+                if not chunk_count:
+                    raise ValueError("No content extracted from file")
+                
+                logger.info(f"✅ Translation completed: {chunk_count} chunks")
+                
+                # Small outputs are served from Redis; disk copy kept per OUTPUT_PERSIST_TO_DISK
+                output_fields = store_spooled_output(job_id, spool, settings.OUTPUT_PERSIST_TO_DISK)
             
-            # Final status update
-            update_job_data(job_id, {
-                'status': JobStatus.COMPLETED.value,
-                'progress': 100,
-                'output_file': output_filename,
-                'output_path': os.path.join(settings.OUTPUT_DIR, output_filename),
-                'message': 'Translation completed successfully!'
-            })
+            # Final status update, merged with any buffered progress
+            output_ext = os.path.splitext(output_filename)[1]
+            progress.update_progress(STATUS_COMPLETED, 100, 'Translation completed successfully!')
+            for field, value in output_fields.items():
+                progress.update(field, value)
+            progress.update('output_media_type', OUTPUT_MEDIA_TYPES.get(output_ext, 'application/octet-stream'))
+            progress.flush()
             
             logger.info(f"🎉 Translation process completed for job {job_id}")
             logger.info(f"📥 Output file: {output_filename}")
@@ -764,7 +1268,7 @@ def process_translation_sync(job_id: str, file_path: str, file_type: str, target
             return output_filename
             
         except Exception as e:
-            logger.error(f"❌ Reconstruction failed: {str(e)}")
+            logger.error(f"❌ Pipeline failed: {str(e)}")
             raise
         
     except Exception as e:
@@ -1,33 +1,143 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from celery.signals import worker_process_init
+import aiohttp
+import asyncio
 import json
+import logging
 import time
 import random
-from typing import Dict
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx needs it for http2=True
+    HTTPX_HTTP2_AVAILABLE = True
+except ImportError:
+    HTTPX_HTTP2_AVAILABLE = False
+
+# Language code mapping
+LANG_MAP = {
+    'auto': 'auto',
+    'en': 'en',
+    'vi': 'vi',
+    'es': 'es',
+    'fr': 'fr',
+    'de': 'de',
+    'ja': 'ja',
+    'ko': 'ko',
+    'zh': 'zh-CN',
+    'th': 'th',
+    'id': 'id'
+}
+
+# Batch limits keep the GET request URL within the endpoint's size limit
+BATCH_MAX_CHARS = 2000
+BATCH_MAX_ITEMS = 32
+BATCH_SEPARATOR = "\n|||\n"
+
+GOOGLE_TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+
+# Max in-flight requests when translating batches concurrently
+ASYNC_CONCURRENCY = 16
+
+# Premium splits long texts into many small requests; keep them under the endpoint's rate limit
+PREMIUM_CONCURRENCY = 5
+PREMIUM_RATE_PER_SECOND = 5
+# Premium pieces packed into one joined request (also bounded by BATCH_MAX_CHARS)
+PREMIUM_BATCH_ITEMS = 8
+
+# Standard tier retries failed requests with backoff capped at this many seconds
+STANDARD_MAX_ATTEMPTS = 3
+STANDARD_MAX_BACKOFF = 8
+
+def _new_session() -> requests.Session:
+    """Keep-alive session; retries are handled by the tier logic, not urllib3"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=Retry(total=0)))
+    return session
+
+# Session shared by all translation calls in this process
+_session = _new_session()
+
+@worker_process_init.connect
+def _reset_session(**kwargs):
+    """Give each forked Celery worker its own pool instead of the parent's sockets"""
+    global _session
+    _session = _new_session()
+
+# Per-process LRU in front of the requests. The shared Redis cache lives one level
+# up, in pdf_processor.translate_with_cache (tl:{tier}:{target}:{sha1} keys)
+TRANSLATION_LRU_SIZE = 50_000
+TRANSLATION_LRU_TTL = 24 * 3600  # 24 hours
+
+_translation_lru = OrderedDict()
+_translation_lru_lock = threading.Lock()
+
+def _translation_key(text: str, target: str, source: str) -> tuple:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), source, target
+
+def _lru_get(key: tuple) -> Optional[str]:
+    with _translation_lru_lock:
+        entry = _translation_lru.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _translation_lru[key]
+            return None
+        _translation_lru.move_to_end(key)
+        return value
+
+def _lru_put(key: tuple, value: str) -> None:
+    with _translation_lru_lock:
+        _translation_lru[key] = (value, time.monotonic() + TRANSLATION_LRU_TTL)
+        _translation_lru.move_to_end(key)
+        if len(_translation_lru) > TRANSLATION_LRU_SIZE:
+            _translation_lru.popitem(last=False)
 
 def google_translate_free(text: str, target: str, source: str = 'auto') -> str:
+    """Use Google Translate free API, served from the in-process LRU when possible"""
+    key = _translation_key(text, target, source)
+    cached = _lru_get(key)
+    if cached is not None:
+        return cached
+    
+    result = _google_translate_request(text, target, source)
+    if not result.startswith('[Error'):
+        _lru_put(key, result)
+    return result
+
+def _translate_params(text: str, target: str, source: str) -> Dict[str, str]:
+    """Query parameters for one request to GOOGLE_TRANSLATE_URL"""
+    return {
+        'client': 'gtx',
+        'sl': source,
+        'tl': target,
+        'dt': 't',
+        'q': text
+    }
+
+def _parse_translation(result) -> str:
+    """Translated text from a decoded GOOGLE_TRANSLATE_URL response"""
+    return ''.join([item[0] for item in result[0] if item[0]])
+
+def _google_translate_request(text: str, target: str, source: str) -> str:
     """Use Google Translate free API"""
     try:
-        url = "https://translate.googleapis.com/translate_a/single"
-        params = {
-            'client': 'gtx',
-            'sl': source,
-            'tl': target,
-            'dt': 't',
-            'q': text
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
+        response = _session.get(GOOGLE_TRANSLATE_URL, params=_translate_params(text, target, source), timeout=10)
         if response.status_code == 200:
-            result = json.loads(response.text)
-            translated = ''
-            for item in result[0]:
-                if item[0]:
-                    translated += item[0]
-            return translated
+            return _parse_translation(json.loads(response.text))
         else:
             return f"[Error {response.status_code}] {text}"
     except Exception as e:
-        print(f"Translation error: {e}")
+        logger.warning("Translation error: %s", e)
         return f"[Error] {text}"
 
 def translate_with_tier(text: str, source_lang: str, target_lang: str, tier: str) -> str:
@@ -36,66 +146,247 @@ def translate_with_tier(text: str, source_lang: str, target_lang: str, tier: str
     if not text.strip():
         return text
     
-    # Language code mapping
-    lang_map = {
-        'auto': 'auto',
-        'en': 'en',
-        'vi': 'vi',
-        'es': 'es',
-        'fr': 'fr',
-        'de': 'de',
-        'ja': 'ja',
-        'ko': 'ko',
-        'zh': 'zh-CN',
-        'th': 'th',
-        'id': 'id'
-    }
-    
-    src = lang_map.get(source_lang, source_lang)
-    tgt = lang_map.get(target_lang, target_lang)
+    src = LANG_MAP.get(source_lang, source_lang)
+    tgt = LANG_MAP.get(target_lang, target_lang)
     
     if tier == 'basic':
         # Quick translation, no retry
         return google_translate_free(text, tgt, src)
     
     elif tier == 'standard':
-        # With retry logic
-        for attempt in range(3):
+        # With retry logic; jittered exponential backoff keeps workers from retrying in lockstep
+        for attempt in range(STANDARD_MAX_ATTEMPTS):
             result = google_translate_free(text, tgt, src)
             if not result.startswith('[Error'):
                 return result
-            time.sleep(1)  # Rate limiting
+            if attempt < STANDARD_MAX_ATTEMPTS - 1:
+                time.sleep(min(2 ** attempt + random.random(), STANDARD_MAX_BACKOFF))
         return result
     
     elif tier == 'premium':
         # Split long text into chunks for better quality
         if len(text) > 1000:
-            # Split by paragraphs
-            paragraphs = text.split('\n\n')
-            translated_paragraphs = []
-            
-            for para in paragraphs:
-                if para.strip():
-                    # Further split if still too long
-                    if len(para) > 1000:
-                        sentences = para.split('. ')
-                        trans_sentences = []
-                        for sent in sentences:
-                            if sent.strip():
-                                trans = google_translate_free(sent, tgt, src)
-                                trans_sentences.append(trans)
-                                time.sleep(0.2)  # Rate limit
-                        translated_paragraphs.append('. '.join(trans_sentences))
-                    else:
-                        trans = google_translate_free(para, tgt, src)
-                        translated_paragraphs.append(trans)
-                        time.sleep(0.2)
-                else:
-                    translated_paragraphs.append(para)
-            
-            return '\n\n'.join(translated_paragraphs)
+            # Synchronous callers only; async code awaits _translate_premium_async
+            return asyncio.run(_translate_premium_async(text, tgt, src))
         else:
             # Short text, translate directly
             return google_translate_free(text, tgt, src)
     
     return text
+
+async def _translate_cached_async(fetch, text: str, target: str, source: str) -> str:
+    """Cache lookup, error handling and bookkeeping shared by the async transports
+    
+    fetch(params) performs the request and returns (status, decoded JSON or None).
+    """
+    key = _translation_key(text, target, source)
+    cached = _lru_get(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        status, result = await fetch(_translate_params(text, target, source))
+        if status != 200:
+            return f"[Error {status}] {text}"
+        translated = _parse_translation(result)
+    except Exception as e:
+        logger.warning("Translation error: %s", e)
+        return f"[Error] {text}"
+    _lru_put(key, translated)
+    return translated
+
+async def google_translate_free_async(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                                     text: str, target: str, source: str = 'auto') -> str:
+    """Async variant of google_translate_free, bounded by a shared semaphore"""
+    async def fetch(params):
+        async with sem:
+            async with session.get(GOOGLE_TRANSLATE_URL, params=params) as response:
+                if response.status != 200:
+                    return response.status, None
+                return response.status, await response.json(content_type=None)
+    
+    return await _translate_cached_async(fetch, text, target, source)
+
+class _RateLimiter:
+    """Space request starts at least 1/rate seconds apart
+    
+    Uses a thread lock and the monotonic clock rather than loop primitives,
+    so one instance holds across event loops and threads.
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+    
+    async def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# Every premium request in the process shares this cap
+_premium_limiter = _RateLimiter(PREMIUM_RATE_PER_SECOND)
+
+async def _google_translate_http2(client: "httpx.AsyncClient", sem: asyncio.Semaphore,
+                                  text: str, target: str, source: str = 'auto') -> str:
+    """google_translate_free_async over an HTTP/2 client, so requests share one connection"""
+    async def fetch(params):
+        async with sem:
+            response = await client.get(GOOGLE_TRANSLATE_URL, params=params)
+        if response.status_code != 200:
+            return response.status_code, None
+        return response.status_code, response.json()
+    
+    return await _translate_cached_async(fetch, text, target, source)
+
+def _pack_texts(texts: List[str], max_items: int, max_chars: int = BATCH_MAX_CHARS) -> List[List[int]]:
+    """Group consecutive text indices into batches that fit one joined request"""
+    groups = []
+    batch = []
+    batch_chars = 0
+    for i, text in enumerate(texts):
+        if batch and (batch_chars + len(text) > max_chars or len(batch) >= max_items):
+            groups.append(batch)
+            batch = []
+            batch_chars = 0
+        batch.append(i)
+        batch_chars += len(text) + len(BATCH_SEPARATOR)
+    if batch:
+        groups.append(batch)
+    return groups
+
+def _split_joined(result: str, count: int) -> Optional[List[str]]:
+    """Split a joined translation back into its parts; None if the separators didn't survive"""
+    if result.startswith('[Error'):
+        return None
+    parts = [part.strip() for part in result.split('|||')]
+    if len(parts) != count:
+        return None
+    return parts
+
+async def _translate_premium_async(text: str, tgt: str, src: str) -> str:
+    """Premium translation of a long text: paragraphs (and long paragraphs' sentences) sent concurrently"""
+    # Split by paragraphs, remembering which pieces make up each one
+    paragraphs = text.split('\n\n')
+    layout = []
+    pieces = []
+    
+    for para in paragraphs:
+        if para.strip():
+            # Further split if still too long
+            if len(para) > 1000:
+                parts = [sent for sent in para.split('. ') if sent.strip()]
+            else:
+                parts = [para]
+            layout.append(range(len(pieces), len(pieces) + len(parts)))
+            pieces.extend(parts)
+        else:
+            layout.append(None)
+    
+    # Translate every piece concurrently under the premium rate limit
+    translated = await _translate_many_async(pieces, tgt, src)
+    
+    return '\n\n'.join(
+        para if indices is None else '. '.join(translated[i] for i in indices)
+        for para, indices in zip(paragraphs, layout)
+    )
+
+async def _translate_many_async(texts: List[str], tgt: str, src: str,
+                                concurrency: int = PREMIUM_CONCURRENCY,
+                                limiter: _RateLimiter = _premium_limiter) -> List[str]:
+    """Translate texts concurrently, in order, with request starts spaced by limiter
+    
+    Consecutive texts are packed into joined requests of up to PREMIUM_BATCH_ITEMS;
+    a batch whose result can't be split back is retried one text per request.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    results = list(texts)
+    
+    async def run(fetch) -> None:
+        async def translate_one(text: str) -> str:
+            await limiter.wait()
+            return await fetch(text)
+        
+        async def run_group(group: List[int]) -> None:
+            translated = None
+            if len(group) > 1:
+                joined = await translate_one(BATCH_SEPARATOR.join(texts[i] for i in group))
+                translated = _split_joined(joined, len(group))
+            if translated is None:
+                translated = await asyncio.gather(*[translate_one(texts[i]) for i in group])
+            for i, text in zip(group, translated):
+                results[i] = text
+        
+        await asyncio.gather(*[run_group(group) for group in _pack_texts(texts, PREMIUM_BATCH_ITEMS)])
+    
+    if HTTPX_HTTP2_AVAILABLE:
+        # Multiplex every request over HTTP/2 instead of one TLS connection each
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(http2=True, timeout=10, limits=limits) as client:
+            await run(lambda text: _google_translate_http2(client, sem, text, tgt, src))
+    else:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            await run(lambda text: google_translate_free_async(session, sem, text, tgt, src))
+    
+    return results
+
+async def _translate_joined(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                            texts: List[str], tgt: str, src: str) -> Optional[List[str]]:
+    """Translate several texts in one request; None if the result can't be split back"""
+    result = await google_translate_free_async(session, sem, BATCH_SEPARATOR.join(texts), tgt, src)
+    return _split_joined(result, len(texts))
+
+async def _translate_batches(texts: List[str], groups: List[List[int]], singles: List[int],
+                             source_lang: str, target_lang: str, tier: str, results: List[str]) -> None:
+    """Run all packed groups and standalone texts concurrently"""
+    src = LANG_MAP.get(source_lang, source_lang)
+    tgt = LANG_MAP.get(target_lang, target_lang)
+    sem = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    
+    def translate_each(indices: List[int]) -> List[str]:
+        return [translate_with_tier(texts[i], source_lang, target_lang, tier) for i in indices]
+    
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        async def run_group(group: List[int]) -> None:
+            translated = await _translate_joined(session, sem, [texts[i] for i in group], tgt, src)
+            if translated is None:
+                # Fall back to per-text requests with the tier's retry rules
+                translated = await asyncio.to_thread(translate_each, group)
+            for i, text in zip(group, translated):
+                results[i] = text
+        
+        async def run_single(i: int) -> None:
+            # Long texts keep the tier's own handling; premium splits them on this loop
+            if tier == 'premium':
+                results[i] = await _translate_premium_async(texts[i], tgt, src)
+            else:
+                results[i] = await asyncio.to_thread(translate_with_tier, texts[i], source_lang, target_lang, tier)
+        
+        await asyncio.gather(*[run_group(group) for group in groups], *[run_single(i) for i in singles])
+
+def translate_batch_with_tier(texts: List[str], source_lang: str, target_lang: str, tier: str) -> List[str]:
+    """Translate a list of texts, packing short ones into shared requests sent concurrently"""
+    results = list(texts)
+    candidates = []
+    singles = []
+    
+    for i, text in enumerate(texts):
+        if not text.strip():
+            continue
+        if len(text) > BATCH_MAX_CHARS or (tier == 'premium' and len(text) > 1000):
+            singles.append(i)
+        else:
+            candidates.append(i)
+    
+    groups = [
+        [candidates[j] for j in group]
+        for group in _pack_texts([texts[i] for i in candidates], BATCH_MAX_ITEMS)
+    ]
+    
+    if groups or singles:
+        asyncio.run(_translate_batches(texts, groups, singles, source_lang, target_lang, tier, results))
+    
+    return results
@@ -1,4 +1,4 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 
 class Settings(BaseSettings):
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     OUTPUT_DIR: str = "./outputs"
     MAX_FILE_SIZE: int = 50 * 1024 * 1024
+    OUTPUT_PERSIST_TO_DISK: bool = True  # False: small outputs live only in Redis
     
     # API Keys (optional)
     OPENAI_API_KEY: str = ""
@@ -16,12 +17,17 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: str = ""
     GOOGLE_APPLICATION_CREDENTIALS: str = ""
     
-    class Config:
-        env_file = ".env"
-        extra = "allow"  # Allow extra fields
+    # Settings are read once at import and never reassigned; static defaults skip validation
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="allow",  # Allow extra fields
+        frozen=True,
+        validate_default=False,
+    )
 
 settings = Settings()
 
-# Create directories
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+# Create directories; a stat is enough once they exist in every later worker
+for _directory in (settings.UPLOAD_DIR, settings.OUTPUT_DIR):
+    if not os.path.isdir(_directory):
+        os.makedirs(_directory, exist_ok=True)
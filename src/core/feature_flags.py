@@ -3,6 +3,8 @@ Feature Flag System
 Control rollout of new features
 """
 import os
+import functools
+from dataclasses import dataclass, field, replace
 from typing import Dict, Any
 from enum import Enum
 
@@ -12,43 +14,55 @@ class FeatureStage(Enum):
     BETA = "beta"
     GA = "ga"  # General Availability
 
+# User tiers that see BETA features
+BETA_TIERS = frozenset({"premium", "beta"})
+
+@dataclass(frozen=True)
+class Feature:
+    """A feature definition; replaced rather than mutated on stage changes"""
+    stage: FeatureStage
+    description: str = ""
+    config: Dict[str, Any] = field(default_factory=dict)
+
 class FeatureFlags:
     """Manage feature rollout"""
     
+    # Read once at import; is_enabled results are cached per (feature, tier)
+    INTERNAL_USER = os.getenv("PRISMY_INTERNAL_USER") == "true"
+    
     # Feature definitions
-    FEATURES = {
-        "advanced_pdf_processing": {
-            "stage": FeatureStage.OFF,
-            "description": "Advanced PDF with tables, images, OCR",
-            "config": {
+    FEATURES: Dict[str, Feature] = {
+        "advanced_pdf_processing": Feature(
+            stage=FeatureStage.OFF,
+            description="Advanced PDF with tables, images, OCR",
+            config={
                 "table_extraction": True,
                 "ocr_enabled": True,
                 "formula_extraction": False  # Phase 2
             }
-        },
-        "smart_chunking": {
-            "stage": FeatureStage.GA,
-            "description": "Intelligent text chunking",
-            "config": {}
-        }
+        ),
+        "smart_chunking": Feature(
+            stage=FeatureStage.GA,
+            description="Intelligent text chunking"
+        )
     }
     
     @classmethod
+    @functools.lru_cache(maxsize=256)
     def is_enabled(cls, feature: str, user_tier: str = "standard") -> bool:
         """Check if feature is enabled"""
         if feature not in cls.FEATURES:
             return False
             
-        feature_config = cls.FEATURES[feature]
-        stage = feature_config["stage"]
+        stage = cls.FEATURES[feature].stage
         
         # Feature rollout logic
         if stage == FeatureStage.OFF:
             return False
         elif stage == FeatureStage.INTERNAL:
-            return os.getenv("PRISMY_INTERNAL_USER") == "true"
+            return cls.INTERNAL_USER
         elif stage == FeatureStage.BETA:
-            return user_tier in ["premium", "beta"]
+            return user_tier in BETA_TIERS
         elif stage == FeatureStage.GA:
             return True
             
@@ -58,11 +72,12 @@ class FeatureFlags:
     def get_config(cls, feature: str) -> Dict[str, Any]:
         """Get feature configuration"""
         if feature in cls.FEATURES:
-            return cls.FEATURES[feature]["config"]
+            return cls.FEATURES[feature].config
         return {}
         
     @classmethod
     def set_stage(cls, feature: str, stage: FeatureStage):
         """Update feature stage (for testing/rollout)"""
         if feature in cls.FEATURES:
-            cls.FEATURES[feature]["stage"] = stage
+            cls.FEATURES[feature] = replace(cls.FEATURES[feature], stage=stage)
+            cls.is_enabled.cache_clear()
@@ -8,6 +8,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Whitespace normalization patterns
+MULTI_SPACE_RE = re.compile(r' +')
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
 class SmartChunker:
     """
     Advanced text chunking with context preservation
@@ -18,6 +22,16 @@ class SmartChunker:
     - Multi-language support
     """
     
+    # Sentence endings for different languages
+    SENTENCE_ENDINGS = {
+        "vi": [".", "!", "?", "。", "！", "？"],  # Vietnamese + Chinese punctuation
+        "en": [".", "!", "?"],
+        "default": [".", "!", "?", "。", "！", "？", "।", "।"]
+    }
+    
+    # Compiled sentence patterns, shared by all instances and built once per language
+    _SENTENCE_RES: Dict[str, "re.Pattern"] = {}
+    
     def __init__(
         self, 
         chunk_size: int = 3000,
@@ -28,12 +42,19 @@ class SmartChunker:
         self.overlap_size = overlap_size
         self.language = language
         
-        # Sentence endings for different languages
-        self.sentence_endings = {
-            "vi": [".", "!", "?", "。", "！", "？"],  # Vietnamese + Chinese punctuation
-            "en": [".", "!", "?"],
-            "default": [".", "!", "?", "。", "！", "？", "।", "।"]
-        }
+        self.sentence_endings = self.SENTENCE_ENDINGS
+        self._sentence_re = self._sentence_pattern(language)
+        
+    @classmethod
+    def _sentence_pattern(cls, language: str) -> "re.Pattern":
+        """Pattern matching one sentence up to and including its ending punctuation"""
+        pattern = cls._SENTENCE_RES.get(language)
+        if pattern is None:
+            endings = cls.SENTENCE_ENDINGS.get(language, cls.SENTENCE_ENDINGS["default"])
+            char_class = ''.join(re.escape(e) for e in endings)
+            pattern = re.compile(f"[^{char_class}]*[{char_class}]")
+            cls._SENTENCE_RES[language] = pattern
+        return pattern
         
     def chunk_text(self, text: str, preserve_paragraphs: bool = True) -> List[Dict[str, Any]]:
         """
@@ -75,9 +96,9 @@ class SmartChunker:
     def _normalize_whitespace(self, text: str) -> str:
         """Normalize whitespace while preserving paragraph breaks"""
         # Replace multiple spaces with single space
-        text = re.sub(r' +', ' ', text)
+        text = MULTI_SPACE_RE.sub(' ', text)
         # Preserve paragraph breaks (multiple newlines)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = PARAGRAPH_BREAK_RE.sub('\n\n', text)
         # Remove trailing whitespace
         text = '\n'.join(line.rstrip() for line in text.split('\n'))
         return text.strip()
@@ -87,7 +108,9 @@ class SmartChunker:
         chunks = []
         paragraphs = text.split('\n\n')
         
-        current_chunk = ""
+        # Paragraphs of the chunk being built and its joined length
+        current_parts = []
+        current_len = 0
         start_char = 0
         
         for i, para in enumerate(paragraphs):
@@ -96,30 +119,29 @@ class SmartChunker:
                 continue
                 
             # Check if adding this paragraph exceeds chunk size
-            if current_chunk and len(current_chunk) + len(para) + 2 > self.chunk_size:
+            if current_parts and current_len + len(para) + 2 > self.chunk_size:
                 # Save current chunk
                 chunks.append({
-                    "text": current_chunk.strip(),
+                    "text": "\n\n".join(current_parts).strip(),
                     "start_char": start_char,
-                    "end_char": start_char + len(current_chunk)
+                    "end_char": start_char + current_len
                 })
                 
                 # Start new chunk
-                current_chunk = para
-                start_char = start_char + len(current_chunk) + 2
+                current_parts = [para]
+                current_len = len(para)
+                start_char = start_char + current_len + 2
             else:
                 # Add to current chunk
-                if current_chunk:
-                    current_chunk += "\n\n" + para
-                else:
-                    current_chunk = para
+                current_len += (len(para) + 2) if current_parts else len(para)
+                current_parts.append(para)
         
         # Add last chunk
-        if current_chunk:
+        if current_parts:
             chunks.append({
-                "text": current_chunk.strip(),
+                "text": "\n\n".join(current_parts).strip(),
                 "start_char": start_char,
-                "end_char": start_char + len(current_chunk)
+                "end_char": start_char + current_len
             })
             
         # If paragraphs are too long, further split by sentences
@@ -135,22 +157,12 @@ class SmartChunker:
     
     def _chunk_by_sentences(self, text: str) -> List[Dict[str, Any]]:
         """Chunk text by sentence boundaries"""
-        endings = self.sentence_endings.get(self.language, self.sentence_endings["default"])
-        
-        # Create regex pattern for sentence endings
-        pattern = f"[{''.join(re.escape(e) for e in endings)}]"
-        sentences = re.split(f"({pattern})", text)
+        # Each match is a sentence with its ending punctuation; text after the last ending is not matched
+        full_sentences = self._sentence_re.findall(text)
         
-        # Reconstruct sentences (join text with its ending punctuation)
-        full_sentences = []
-        for i in range(0, len(sentences)-1, 2):
-            if i+1 < len(sentences):
-                full_sentences.append(sentences[i] + sentences[i+1])
-            else:
-                full_sentences.append(sentences[i])
-                
         chunks = []
-        current_chunk = ""
+        current_parts = []
+        current_len = 0
         start_char = 0
         
         for sentence in full_sentences:
@@ -158,27 +170,26 @@ class SmartChunker:
             if not sentence:
                 continue
                 
-            if current_chunk and len(current_chunk) + len(sentence) + 1 > self.chunk_size:
+            if current_parts and current_len + len(sentence) + 1 > self.chunk_size:
                 chunks.append({
-                    "text": current_chunk.strip(),
+                    "text": " ".join(current_parts).strip(),
                     "start_char": start_char,
-                    "end_char": start_char + len(current_chunk)
+                    "end_char": start_char + current_len
                 })
                 
-                current_chunk = sentence
-                start_char = start_char + len(current_chunk) + 1
+                current_parts = [sentence]
+                current_len = len(sentence)
+                start_char = start_char + current_len + 1
             else:
-                if current_chunk:
-                    current_chunk += " " + sentence
-                else:
-                    current_chunk = sentence
+                current_len += (len(sentence) + 1) if current_parts else len(sentence)
+                current_parts.append(sentence)
                     
         # Add last chunk
-        if current_chunk:
+        if current_parts:
             chunks.append({
-                "text": current_chunk.strip(),
+                "text": " ".join(current_parts).strip(),
                 "start_char": start_char,
-                "end_char": start_char + len(current_chunk)
+                "end_char": start_char + current_len
             })
             
         return chunks
@@ -188,29 +199,32 @@ class SmartChunker:
         if len(chunks) <= 1:
             return chunks
             
-        overlapped_chunks = []
+        # Overlap disabled: nothing to prepend
+        if self.overlap_size <= 0:
+            for chunk in chunks:
+                chunk["overlap_start"] = 0
+            return chunks
+            
+        # Chunks are updated in place; keep the previous chunk's text as it was before its own overlap
+        chunks[0]["overlap_start"] = 0
+        prev_text = chunks[0]["text"]
         
-        for i, chunk in enumerate(chunks):
-            new_chunk = chunk.copy()
+        for chunk in chunks[1:]:
+            text = chunk["text"]
             
             # Add overlap from previous chunk
-            if i > 0 and self.overlap_size > 0:
-                prev_text = chunks[i-1]["text"]
-                overlap_text = prev_text[-self.overlap_size:]
-                
-                # Find word boundary for clean overlap
-                space_pos = overlap_text.find(' ')
-                if space_pos > 0:
-                    overlap_text = overlap_text[space_pos+1:]
-                    
-                new_chunk["text"] = overlap_text + " " + new_chunk["text"]
-                new_chunk["overlap_start"] = len(overlap_text)
-            else:
-                new_chunk["overlap_start"] = 0
+            overlap_text = prev_text[-self.overlap_size:]
+            
+            # Find word boundary for clean overlap
+            space_pos = overlap_text.find(' ')
+            if space_pos > 0:
+                overlap_text = overlap_text[space_pos+1:]
                 
-            overlapped_chunks.append(new_chunk)
+            chunk["text"] = ''.join((overlap_text, " ", text))
+            chunk["overlap_start"] = len(overlap_text)
+            prev_text = text
             
-        return overlapped_chunks
+        return chunks
     
     def _add_metadata(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Add metadata to chunks"""
@@ -247,18 +261,40 @@ class SmartChunker:
             current = chunks[i]
             
             # Find overlap between end of merged and start of current
-            overlap_found = False
-            for overlap_size in range(min(self.overlap_size * 2, len(merged), len(current)), 0, -1):
-                if merged.endswith(current[:overlap_size]):
-                    merged += current[overlap_size:]
-                    overlap_found = True
-                    break
-                    
-            if not overlap_found:
+            max_overlap = min(self.overlap_size * 2, len(merged), len(current))
+            overlap = _longest_prefix_suffix(merged[len(merged) - max_overlap:], current[:max_overlap])
+            
+            if overlap:
+                merged += current[overlap:]
+            else:
                 merged += " " + current
                 
         return merged
 
+def _longest_prefix_suffix(tail: str, head: str) -> int:
+    """Length of the longest prefix of head that is a suffix of tail (KMP, linear time)"""
+    if not tail or not head:
+        return 0
+    
+    # Failure function of head
+    failure = [0] * len(head)
+    k = 0
+    for i in range(1, len(head)):
+        while k and head[i] != head[k]:
+            k = failure[k - 1]
+        if head[i] == head[k]:
+            k += 1
+        failure[i] = k
+    
+    # Run head over tail; the final match state is the overlap
+    k = 0
+    for ch in tail:
+        while k and (k == len(head) or ch != head[k]):
+            k = failure[k - 1]
+        if ch == head[k]:
+            k += 1
+    return k
+
 class ChunkProcessor:
     """Process chunks for translation while maintaining context"""
     
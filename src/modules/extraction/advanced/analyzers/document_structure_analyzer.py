@@ -2,12 +2,91 @@
 Document Structure Analyzer
 Analyzes PDF structure for optimal extraction
 """
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, List, Tuple
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+from src.utils.page_pool import page_pool_workers, run_page_ranges_async, threadsafe_mp_context
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Text block grouping thresholds (PDF points)
+BLOCK_LINE_TOLERANCE = 5
+BLOCK_MAX_GAP = 20
+
+# PDFs up to this many pages are analyzed serially to avoid pool start-up cost
+STRUCTURE_PARALLEL_MIN_PAGES = 8
+
+def _first_line_drift(tops: np.ndarray, start: int, end: int) -> int:
+    """Index of the first char in (start, end) off the line of tops[start], or end
+    
+    Scans in doubling windows so each block costs time proportional to its length.
+    """
+    ref = tops[start]
+    pos = start + 1
+    step = 64
+    while pos < end:
+        stop = min(end, pos + step)
+        hits = np.flatnonzero(~(np.abs(tops[pos:stop] - ref) < BLOCK_LINE_TOLERANCE))
+        if hits.size:
+            return pos + int(hits[0])
+        pos = stop
+        step *= 2
+    return end
+
+def _segment_blocks_numpy(x0: np.ndarray, x1: np.ndarray, tops: np.ndarray,
+                          bottoms: np.ndarray) -> Tuple[List[int], List[int]]:
+    """Block start indices and the index of each block's lowest char, from array scans"""
+    n = x0.shape[0]
+    
+    # Horizontal gaps always start a new block
+    gaps = (np.flatnonzero(~(x0[1:] - x1[:-1] < BLOCK_MAX_GAP)) + 1).tolist()
+    gaps.append(n)
+    
+    # Within each gap-free run, split where the line drifts from the block's first top
+    starts = []
+    run_start = 0
+    for run_end in gaps:
+        block_start = run_start
+        while block_start < run_end:
+            starts.append(block_start)
+            block_start = _first_line_drift(tops, block_start, run_end)
+        run_start = run_end
+    
+    bottom_idx = [s + int(np.argmax(bottoms[s:e])) for s, e in zip(starts, starts[1:] + [n])]
+    return starts, bottom_idx
+
+def _segment_blocks_scan(x0: np.ndarray, x1: np.ndarray, tops: np.ndarray,
+                         bottoms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Same as _segment_blocks_numpy as a single sequential pass, compiled with numba"""
+    n = x0.shape[0]
+    starts = np.empty(n, np.int64)
+    bottom_idx = np.empty(n, np.int64)
+    count = 0
+    block_top = 0.0
+    for i in range(n):
+        if i == 0 or not (abs(tops[i] - block_top) < BLOCK_LINE_TOLERANCE and x0[i] - x1[i - 1] < BLOCK_MAX_GAP):
+            starts[count] = i
+            bottom_idx[count] = i
+            count += 1
+            block_top = tops[i]
+        elif bottoms[i] > bottoms[bottom_idx[count - 1]]:
+            bottom_idx[count - 1] = i
+    return starts[:count], bottom_idx[:count]
+
+if NUMBA_AVAILABLE:
+    _segment_blocks_scan = numba.njit(cache=True, nogil=True)(_segment_blocks_scan)
+    _segment_blocks_scan(*(np.zeros(1, np.float64) for _ in range(4)))  # compile at import
+
 class DocumentStructureAnalyzer:
     """Analyze document structure and layout"""
     
@@ -20,86 +99,103 @@ class DocumentStructureAnalyzer:
         Returns information about pages, layout, content types
         """
         try:
-            import pdfplumber
+            # pdfplumber parsing is synchronous, keep it off the event loop
+            page_count, pages, doctops = await asyncio.to_thread(self._analyze_sync, pdf_path)
+            
+            if pages is None:
+                pages = await run_page_ranges_async(
+                    functools.partial(_analyze_page_range, pdf_path, doctops=doctops),
+                    page_count, page_pool_workers(page_count, STRUCTURE_PARALLEL_MIN_PAGES),
+                    threadsafe_mp_context()
+                )
             
-            structure = {
-                "page_count": 0,
-                "pages": [],
-                "has_tables": False,
-                "has_images": False,
+            return {
+                "page_count": page_count,
+                "pages": pages,
+                "has_tables": any(page_info["has_tables"] for page_info in pages),
+                "has_images": any(page_info["has_images"] for page_info in pages),
                 "has_multi_columns": False,
                 "dominant_font": None,
                 "text_blocks": []
             }
             
-            with pdfplumber.open(pdf_path) as pdf:
-                structure["page_count"] = len(pdf.pages)
-                
-                for page_num, page in enumerate(pdf.pages):
-                    page_info = {
-                        "page_number": page_num + 1,
-                        "width": page.width,
-                        "height": page.height,
-                        "has_tables": bool(page.find_tables()),
-                        "has_images": bool(page.images),
-                        "text_bbox": [],
-                        "layout": "single_column"  # default
-                    }
-                    
-                    # Analyze text blocks
-                    if page.chars:
-                        text_blocks = self._analyze_text_blocks(page.chars)
-                        page_info["text_blocks"] = text_blocks
-                        page_info["layout"] = self._detect_layout(text_blocks)
-                        
-                    # Check for tables
-                    if page_info["has_tables"]:
-                        structure["has_tables"] = True
-                        
-                    # Check for images
-                    if page_info["has_images"]:
-                        structure["has_images"] = True
-                        
-                    structure["pages"].append(page_info)
-                    
-            return structure
-            
         except Exception as e:
             logger.error(f"Structure analysis failed: {e}")
             return {"error": str(e), "page_count": 0}
             
+    def _analyze_sync(self, pdf_path: str) -> Tuple[int, Optional[List[Dict[str, Any]]], Optional[List[float]]]:
+        """Open the PDF once; analyze it here unless it is worth fanning out to a process pool
+        
+        Returns the page count and the page list, or None for the pages plus each
+        page's document offset (initial_doctop) when the caller should analyze
+        them in parallel.
+        """
+        import pdfplumber
+        
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+            
+            # Small PDFs stay serial on the already-open document
+            if page_pool_workers(page_count, STRUCTURE_PARALLEL_MIN_PAGES):
+                return page_count, None, [page.initial_doctop for page in pdf.pages]
+                
+            return page_count, [self._analyze_page(page, page_num) for page_num, page in enumerate(pdf.pages)], None
+            
+    def _analyze_page(self, page, page_num: int) -> Dict[str, Any]:
+        """Analyze a single pdfplumber page"""
+        # pdfplumber builds these on access; read each once
+        chars = page.chars
+        tables = page.find_tables()
+        
+        page_info = {
+            "page_number": page_num + 1,
+            "width": page.width,
+            "height": page.height,
+            "has_tables": bool(tables),
+            "has_images": bool(page.images),
+            "text_bbox": [],
+            "layout": "single_column"  # default
+        }
+        
+        # Analyze text blocks
+        if chars:
+            text_blocks = self._analyze_text_blocks(chars)
+            page_info["text_blocks"] = text_blocks
+            page_info["layout"] = self._detect_layout(text_blocks)
+            
+        return page_info
+        
     def _analyze_text_blocks(self, chars: List[Dict]) -> List[Dict[str, Any]]:
-        """Analyze character data to identify text blocks"""
+        """Analyze character data to identify text blocks
+        
+        A character joins the current block when it sits within 5pt of the
+        block's first line and less than 20pt right of the previous character.
+        Boundaries are found on NumPy coordinate arrays, by a numba-compiled
+        scan when available; Python only loops once per block.
+        """
         if not chars:
             return []
-            
-        # Group characters into blocks based on position
-        blocks = []
-        current_block = {
-            "bbox": [chars[0]["x0"], chars[0]["top"], chars[0]["x1"], chars[0]["bottom"]],
-            "chars": [chars[0]],
-            "text": chars[0].get("text", "")
-        }
         
-        for char in chars[1:]:
-            # Check if character belongs to current block
-            if (abs(char["top"] - current_block["bbox"][1]) < 5 and  # Same line
-                char["x0"] - current_block["bbox"][2] < 20):  # Close horizontally
-                # Add to current block
-                current_block["chars"].append(char)
-                current_block["text"] += char.get("text", "")
-                current_block["bbox"][2] = char["x1"]  # Extend right
-                current_block["bbox"][3] = max(current_block["bbox"][3], char["bottom"])
-            else:
-                # Start new block
-                blocks.append(current_block)
-                current_block = {
-                    "bbox": [char["x0"], char["top"], char["x1"], char["bottom"]],
-                    "chars": [char],
-                    "text": char.get("text", "")
-                }
-                
-        blocks.append(current_block)
+        n = len(chars)
+        x0 = np.fromiter((c["x0"] for c in chars), dtype=np.float64, count=n)
+        x1 = np.fromiter((c["x1"] for c in chars), dtype=np.float64, count=n)
+        tops = np.fromiter((c["top"] for c in chars), dtype=np.float64, count=n)
+        bottoms = np.fromiter((c["bottom"] for c in chars), dtype=np.float64, count=n)
+        
+        # Without numba the scalar scan would be slower than the array version
+        if NUMBA_AVAILABLE:
+            starts, bottom_idx = (a.tolist() for a in _segment_blocks_scan(x0, x1, tops, bottoms))
+        else:
+            starts, bottom_idx = _segment_blocks_numpy(x0, x1, tops, bottoms)
+        
+        blocks = []
+        for s, e, b in zip(starts, starts[1:] + [n], bottom_idx):
+            block_chars = chars[s:e]
+            blocks.append({
+                "bbox": [chars[s]["x0"], chars[s]["top"], chars[e - 1]["x1"], chars[b]["bottom"]],
+                "chars": block_chars,
+                "text": "".join(c.get("text", "") for c in block_chars)
+            })
         return blocks
         
     def _detect_layout(self, text_blocks: List[Dict]) -> str:
@@ -112,27 +208,42 @@ class DocumentStructureAnalyzer:
         
         # Simple heuristic: if text starts at very different x positions, might be multi-column
         if len(set(x_positions)) > 10:  # Many different x positions
-            x_clusters = self._cluster_positions(x_positions)
-            if len(x_clusters) > 1:
+            # Only the cluster count matters here, so skip building the clusters
+            _, breaks = self._cluster_breaks(x_positions)
+            if len(breaks) + 1 > 1:
                 return "multi_column"
                 
         return "single_column"
         
+    def _cluster_breaks(self, positions: List[float], threshold: float = 50) -> Tuple[np.ndarray, np.ndarray]:
+        """Sort positions and return them with the indices where a new cluster starts"""
+        arr = np.sort(np.asarray(positions, dtype=np.float64))
+        return arr, np.flatnonzero(np.diff(arr) > threshold) + 1
+        
     def _cluster_positions(self, positions: List[float], threshold: float = 50) -> List[List[float]]:
-        """Cluster positions to detect columns"""
+        """Cluster positions to detect columns
+        
+        Sorted sweep: a gap wider than threshold between neighbours starts a new cluster.
+        """
         if not positions:
             return []
             
-        clusters = [[positions[0]]]
-        
-        for pos in positions[1:]:
-            added = False
-            for cluster in clusters:
-                if abs(pos - cluster[0]) < threshold:
-                    cluster.append(pos)
-                    added = True
-                    break
-            if not added:
-                clusters.append([pos])
-                
-        return clusters
+        arr, breaks = self._cluster_breaks(positions, threshold)
+        return [cluster.tolist() for cluster in np.split(arr, breaks)]
+
+def _analyze_page_range(pdf_path: str, page_range: range, doctops: List[float]) -> List[Dict[str, Any]]:
+    """Process pool entry point: analyze a contiguous range of pages
+    
+    doctops holds every page's document offset (pdfplumber's initial_doctop).
+    """
+    import pdfplumber
+    
+    analyzer = DocumentStructureAnalyzer()
+    # Only the requested pages are parsed
+    with pdfplumber.open(pdf_path, pages=[page_num + 1 for page_num in page_range]) as pdf:
+        pages = []
+        for page, doctop in zip(pdf.pages, doctops[page_range.start:page_range.stop]):
+            # Skipped pages don't count towards doctop; restore the document-wide offset
+            page.initial_doctop = doctop
+            pages.append(analyzer._analyze_page(page, page.page_number - 1))
+        return pages
@@ -1,12 +1,20 @@
 """
 Advanced PDF Processor with OCR and Formula Support
 """
+import asyncio
+import base64
+import hashlib
 import logging
+import os
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# OCR results kept per processor, keyed by image content; repeated logos and stamps are OCR'd once
+OCR_CACHE_SIZE = 256
+
 class BaseModule:
     """Base class for all modules"""
     def validate_config(self):
@@ -55,6 +63,8 @@ class AdvancedPDFProcessor(BaseModule):
             "extract_tables": True,
             "extract_images": True,
             "extract_text": True,
+            "image_spill_dir": None,  # Directory for extracted images; None keeps them in memory.
+                                      # Never pruned by the processor: the caller cleans it up
             "max_processing_time": 300
         }
         
@@ -79,12 +89,19 @@ class AdvancedPDFProcessor(BaseModule):
             
         if self.config.get("extract_tables", True):
             self.table_extractor = TableExtractor({
-                "method": self.config.get("table_extraction_method", "pdfplumber")
+                "method": self.config.get("table_extraction_method", "pdfplumber"),
+                "emit_csv": self.config.get("table_csv", True)
             })
             
         if self.config.get("extract_images", True):
+            spill_dir = self.config.get("image_spill_dir")
             self.image_extractor = ImageExtractor({
-                "compress": self.config.get("compress_images", True)
+                "compress": self.config.get("compress_images", True),
+                # With OCR, images carry only raw bytes until OCR is done; "data"
+                # is encoded afterwards so each image isn't held twice meanwhile
+                "emit_base64": not self.config.get("enable_ocr", True),
+                "keep_raw_bytes": self.config.get("enable_ocr", True),
+                "spill_dir": spill_dir
             })
             
     def _initialize_processors(self):
@@ -95,6 +112,7 @@ class AdvancedPDFProcessor(BaseModule):
             self.ocr_processor = OCRProcessor({
                 "languages": self.config.get("ocr_languages", ["eng", "vie"])
             })
+            self._ocr_cache = OrderedDict()
             logger.info("OCRProcessor initialized")
             
         if self.config.get("extract_formulas", True):
@@ -103,6 +121,22 @@ class AdvancedPDFProcessor(BaseModule):
             })
             logger.info("FormulaProcessor initialized")
             
+    async def _ocr_cached(self, img_bytes: bytes, key: bytes) -> Dict[str, Any]:
+        """Run OCR, reusing the result for byte-identical images (key is the SHA-256 digest)"""
+        cached = self._ocr_cache.get(key)
+        if cached is not None:
+            self._ocr_cache.move_to_end(key)
+            return cached
+            
+        ocr_result = await self.ocr_processor.extract(img_bytes)
+        
+        # Failed runs are not cached so the next occurrence retries
+        if "error" not in ocr_result["metadata"]:
+            self._ocr_cache[key] = ocr_result
+            if len(self._ocr_cache) > OCR_CACHE_SIZE:
+                self._ocr_cache.popitem(last=False)
+        return ocr_result
+        
     async def process(self, data: Any) -> Any:
         """Process PDF with all features"""
         if isinstance(data, str):
@@ -131,10 +165,22 @@ class AdvancedPDFProcessor(BaseModule):
             }
         }
         
-        # Extract text
+        # Extractors only depend on the structure: start them all now and
+        # collect each below (OCR still waits for the images)
+        tasks = {}
         if hasattr(self, 'text_extractor'):
+            tasks["text"] = asyncio.create_task(self.text_extractor.extract(pdf_path, document_structure))
+        if hasattr(self, 'table_extractor'):
+            tasks["tables"] = asyncio.create_task(self.table_extractor.extract(pdf_path, document_structure))
+        if hasattr(self, 'image_extractor'):
+            tasks["images"] = asyncio.create_task(self.image_extractor.extract(pdf_path, document_structure))
+        if hasattr(self, 'formula_processor'):
+            tasks["formulas"] = asyncio.create_task(self.formula_processor.extract(pdf_path, document_structure))
+        
+        # Extract text
+        if "text" in tasks:
             try:
-                text_result = await self.text_extractor.extract(pdf_path, document_structure)
+                text_result = await tasks["text"]
                 result["text"] = text_result.get("text", "")
                 result["text_layout"] = text_result.get("layout", [])
                 result["metadata"]["capabilities_used"].append("text_extraction")
@@ -142,18 +188,18 @@ class AdvancedPDFProcessor(BaseModule):
                 logger.error(f"Text extraction failed: {e}")
         
         # Extract tables
-        if hasattr(self, 'table_extractor'):
+        if "tables" in tasks:
             try:
-                table_result = await self.table_extractor.extract(pdf_path, document_structure)
+                table_result = await tasks["tables"]
                 result["tables"] = table_result.get("tables", [])
                 result["metadata"]["capabilities_used"].append("table_extraction")
             except Exception as e:
                 logger.error(f"Table extraction failed: {e}")
                 
         # Extract images
-        if hasattr(self, 'image_extractor'):
+        if "images" in tasks:
             try:
-                image_result = await self.image_extractor.extract(pdf_path, document_structure)
+                image_result = await tasks["images"]
                 result["images"] = image_result.get("images", [])
                 result["metadata"]["capabilities_used"].append("image_extraction")
             except Exception as e:
@@ -163,35 +209,68 @@ class AdvancedPDFProcessor(BaseModule):
         if hasattr(self, 'ocr_processor') and result["images"]:
             try:
                 logger.info("Running OCR on extracted images...")
-                ocr_results = []
                 
+                # Group identical images so each distinct one is OCR'd once
+                unique_images = OrderedDict()
+                image_keys = []
                 for img in result["images"]:
-                    if img.get("data"):
-                        import base64
-                        img_bytes = base64.b64decode(img["data"])
-                        ocr_result = await self.ocr_processor.extract(img_bytes)
+                    if img.get("path"):
+                        # Spilled image: read back from disk only when its OCR runs
+                        key = bytes.fromhex(img["sha256"])
+                        source = img["path"]
+                    else:
+                        source = img.get("_raw_bytes")
+                        if source is None and img.get("data"):
+                            source = base64.b64decode(img["data"])
+                        if not source:
+                            continue
+                        key = hashlib.sha256(source).digest()
+                    unique_images.setdefault(key, source)
+                    image_keys.append((img, key))
+                        
+                # Tesseract runs one process per image; keep one per CPU in flight
+                sem = asyncio.Semaphore(os.cpu_count() or 1)
+                
+                async def ocr_one(key: bytes, source) -> Dict[str, Any]:
+                    async with sem:
+                        if isinstance(source, str):
+                            source = await asyncio.to_thread(Path(source).read_bytes)
+                        return await self._ocr_cached(source, key)
+                        
+                ocr_by_key = dict(zip(unique_images, await asyncio.gather(*(
+                    ocr_one(key, source) for key, source in unique_images.items()
+                ))))
+                
+                ocr_results = []
+                for img, key in image_keys:
+                    ocr_result = ocr_by_key[key]
+                    if ocr_result["text"]:
+                        ocr_results.append({
+                            "image_id": img["id"],
+                            "text": ocr_result["text"],
+                            "confidence": ocr_result["metadata"]["average_confidence"]
+                        })
                         
-                        if ocr_result["text"]:
-                            ocr_results.append({
-                                "image_id": img["id"],
-                                "text": ocr_result["text"],
-                                "confidence": ocr_result["metadata"]["average_confidence"]
-                            })
-                            
                 result["ocr_results"] = ocr_results
                 result["metadata"]["capabilities_used"].append("ocr_processing")
             except Exception as e:
                 logger.error(f"OCR processing failed: {e}")
                 
         # Formula extraction
-        if hasattr(self, 'formula_processor'):
+        if "formulas" in tasks:
             try:
-                formula_result = await self.formula_processor.extract(pdf_path, document_structure)
+                formula_result = await tasks["formulas"]
                 result["formulas"] = formula_result.get("formulas", [])
                 result["metadata"]["capabilities_used"].append("formula_extraction")
             except Exception as e:
                 logger.error(f"Formula extraction failed: {e}")
                 
+        # Raw image bytes are internal to this call: swap them for base64 "data"
+        for img in result["images"]:
+            raw = img.pop("_raw_bytes", None)
+            if raw is not None:
+                img["data"] = base64.b64encode(raw).decode('ascii')
+            
         return result
         
     def get_info(self) -> Dict[str, Any]:
@@ -1,17 +1,134 @@
 """
 Fixed Image Extractor with better error handling
 """
+import asyncio
+import functools
+import hashlib
 import logging
+import os
+import tempfile
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import io
-from PIL import Image
 import base64
 
+from src.utils.page_pool import page_pool_workers, run_page_ranges_async, threadsafe_mp_context
 from ..base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+# Extracted image extensions that can be passed through for each Pillow output format
+IMAGE_EXT_FORMATS = {"PNG": "PNG", "JPEG": "JPEG", "JPG": "JPEG"}
+
+# PDFs up to this many pages have their images extracted serially to avoid pool start-up cost
+IMAGE_PARALLEL_MIN_PAGES = 4
+
+def _extract_page_images(pdf_path: str, page_range: range, min_width: int = 0, min_height: int = 0,
+                         max_per_page: Optional[int] = None) -> List[Dict]:
+    """Extract embedded images from a contiguous range of pages (process pool entry point)
+    
+    Images whose declared size is below min_width/min_height are skipped before
+    their stream is decoded; at most max_per_page images are kept per page.
+    An image shared by several pages is decoded once and reported on each page.
+    """
+    import fitz
+    
+    extracted_images = []
+    seen_xrefs: Dict[int, Dict] = {}
+    with fitz.open(pdf_path) as doc:
+        for page_num in page_range:
+            # The caller's page count may come from another parser
+            if page_num >= doc.page_count:
+                break
+                
+            # Get images in page
+            image_list = doc[page_num].get_images(full=True)
+            page_images = 0
+            
+            for img_index, img_info in enumerate(image_list):
+                if max_per_page is not None and page_images >= max_per_page:
+                    break
+                    
+                # img_info is (xref, smask, width, height, ...)
+                if img_info[2] < min_width or img_info[3] < min_height:
+                    continue
+                    
+                try:
+                    # Extract image by xref
+                    xref = img_info[0]
+                    base_image = seen_xrefs.get(xref)
+                    if base_image is None:
+                        base_image = seen_xrefs[xref] = doc.extract_image(xref)
+                    
+                    if base_image:
+                        image_bytes = base_image["image"]
+                        
+                        extracted_images.append({
+                            "data": image_bytes,
+                            "page": page_num + 1,
+                            "index": img_index,
+                            "ext": base_image.get("ext", "png"),
+                            "width": base_image.get("width", 0),
+                            "height": base_image.get("height", 0),
+                            "bbox": {"x0": 0, "y0": 0, "x1": 100, "y1": 100}  # Placeholder
+                        })
+                        page_images += 1
+                except Exception as e:
+                    logger.warning(f"Failed to extract image {img_index} on page {page_num}: {e}")
+                    
+    return extracted_images
+
+# Resolution for whole-page fallback renders
+RENDER_DPI = 150
+
+def _page_image_data(page_img: "Image.Image", page_num: int) -> Dict:
+    """Image entry for a rendered page, saved as PNG"""
+    # Save page as image
+    img_buffer = io.BytesIO()
+    page_img.save(img_buffer, format='PNG')
+    
+    return {
+        "data": img_buffer.getvalue(),
+        "page": page_num + 1,
+        "index": 0,
+        "ext": "png",
+        "width": page_img.width,
+        "height": page_img.height,
+        "bbox": {"x0": 0, "y0": 0, "x1": page_img.width, "y1": page_img.height}
+    }
+
+def _render_pages_pdfium(pdfium, pdf_path: str, dpi: int) -> List[Dict]:
+    """Render every page with pypdfium2, one bitmap alive at a time"""
+    extracted_images = []
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page_num in range(len(pdf)):
+            page = pdf[page_num]
+            try:
+                extracted_images.append(_page_image_data(page.render(scale=dpi / 72).to_pil(), page_num))
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+    return extracted_images
+
+def _write_spilled_image(path: Path, data: bytes) -> None:
+    """Write a content-addressed image unless it's already there
+    
+    The bytes go to a temporary file in the same directory first and are moved
+    into place with os.replace, so a concurrent reader never sees a partial image.
+    """
+    if path.exists():
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 class ImageExtractor(BaseExtractor):
     """Extract images from PDF with better error handling"""
     
@@ -26,13 +143,29 @@ class ImageExtractor(BaseExtractor):
             "image_format": "PNG",
             "compress": True,
             "compression_quality": 85,
-            "max_images_per_page": 50
+            "max_images_per_page": 50,
+            "emit_base64": True,      # "data" field: base64 of the processed image
+            "keep_raw_bytes": False,  # "_raw_bytes" field: processed bytes for in-process consumers
+            # Write processed images here and return "path"/"sha256" instead of bytes. Files are
+            # named by digest and shared between documents; they are never deleted here, so
+            # whoever owns the directory prunes it (e.g. one directory per job, removed with it)
+            "spill_dir": None
         }
         
         for key, value in defaults.items():
             if key not in self.config:
                 self.config[key] = value
                 
+        # Bound once here; _process_image reads them for every image
+        self._min_w = self.config["min_width"]
+        self._min_h = self.config["min_height"]
+        self._fmt = self.config["image_format"]
+        self._spill_dir = self.config["spill_dir"]
+        if self._spill_dir:
+            os.makedirs(self._spill_dir, exist_ok=True)
+        self._emit_base64 = self.config["emit_base64"]
+        self._keep_raw_bytes = self.config["keep_raw_bytes"]
+                
     async def extract(self, pdf_path: str, document_structure: Dict[str, Any]) -> Dict[str, Any]:
         """Extract images from PDF"""
         try:
@@ -43,7 +176,10 @@ class ImageExtractor(BaseExtractor):
             
             # Try PyMuPDF first
             try:
-                extracted_images = await self._extract_with_pymupdf_fixed(pdf_path)
+                # Reuse the page count from structure analysis instead of opening the PDF to count
+                extracted_images = await self._extract_with_pymupdf_fixed(
+                    pdf_path, document_structure.get("page_count") or None
+                )
                 logger.info(f"PyMuPDF extracted {len(extracted_images)} images")
             except Exception as e:
                 logger.warning(f"PyMuPDF failed: {e}, trying pdf2image")
@@ -54,10 +190,10 @@ class ImageExtractor(BaseExtractor):
                     logger.error(f"Both methods failed: {e2}")
                     extracted_images = []
             
-            # Process images
+            # Process images; ids are numbered over the images kept, without gaps
             for idx, img_data in enumerate(extracted_images):
                 try:
-                    processed_image = await self._process_image(img_data, idx)
+                    processed_image = await self._process_image(img_data, len(images))
                     if processed_image:
                         images.append(processed_image)
                 except Exception as e:
@@ -77,98 +213,97 @@ class ImageExtractor(BaseExtractor):
             logger.error(f"Image extraction failed: {e}")
             return {"images": [], "metadata": {"error": str(e)}}
             
-    async def _extract_with_pymupdf_fixed(self, pdf_path: str) -> List[Dict]:
+    async def _extract_with_pymupdf_fixed(self, pdf_path: str, page_count: Optional[int] = None) -> List[Dict]:
         """Fixed PyMuPDF extraction"""
-        import fitz
-        
-        extracted_images = []
-        doc = fitz.open(pdf_path)
-        
-        for page_num, page in enumerate(doc):
-            # Get images in page
-            image_list = page.get_images(full=True)
+        if page_count is None:
+            import fitz
             
-            for img_index, img_info in enumerate(image_list):
-                try:
-                    # Extract image by xref
-                    xref = img_info[0]
-                    base_image = doc.extract_image(xref)
-                    
-                    if base_image:
-                        image_bytes = base_image["image"]
-                        
-                        extracted_images.append({
-                            "data": image_bytes,
-                            "page": page_num + 1,
-                            "index": img_index,
-                            "ext": base_image.get("ext", "png"),
-                            "width": base_image.get("width", 0),
-                            "height": base_image.get("height", 0),
-                            "bbox": {"x0": 0, "y0": 0, "x1": 100, "y1": 100}  # Placeholder
-                        })
-                except Exception as e:
-                    logger.warning(f"Failed to extract image {img_index} on page {page_num}: {e}")
-                    
-        doc.close()
-        return extracted_images
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
+                
+        extract = functools.partial(
+            _extract_page_images, pdf_path, min_width=self._min_w, min_height=self._min_h,
+            max_per_page=self.config["max_images_per_page"]
+        )
+        
+        # Small PDFs extract serially, still off the event loop. Other extractors
+        # run in threads alongside this one, so the pool mustn't fork
+        workers = page_pool_workers(page_count, IMAGE_PARALLEL_MIN_PAGES)
+        if not workers:
+            return await asyncio.to_thread(extract, range(page_count))
+        return await run_page_ranges_async(extract, page_count, workers, threadsafe_mp_context())
         
     async def _extract_with_pdf2image(self, pdf_path: str) -> List[Dict]:
-        """Fallback extraction using pdf2image"""
+        """Fallback extraction: render pages in-process with pypdfium2, else with pdf2image"""
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            pdfium = None
+            
+        if pdfium is not None:
+            try:
+                return await asyncio.to_thread(_render_pages_pdfium, pdfium, pdf_path, RENDER_DPI)
+            except Exception as e:
+                logger.warning(f"pypdfium2 rendering failed: {e}, trying pdf2image")
+                
         from pdf2image import convert_from_path
         
-        extracted_images = []
-        
         # Convert pages to images
-        pages = convert_from_path(pdf_path, dpi=150)
+        pages = convert_from_path(pdf_path, dpi=RENDER_DPI)
         
-        for page_num, page_img in enumerate(pages):
-            # Save page as image
-            img_buffer = io.BytesIO()
-            page_img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            
-            extracted_images.append({
-                "data": img_buffer.getvalue(),
-                "page": page_num + 1,
-                "index": 0,
-                "ext": "png",
-                "width": page_img.width,
-                "height": page_img.height,
-                "bbox": {"x0": 0, "y0": 0, "x1": page_img.width, "y1": page_img.height}
-            })
-            
-        return extracted_images
+        return [_page_image_data(page_img, page_num) for page_num, page_img in enumerate(pages)]
         
     async def _process_image(self, img_data: Dict, idx: int) -> Optional[Dict[str, Any]]:
-        """Process image data"""
+        """Process image data into the result for image id idx, or None if it's dropped"""
+        # Pillow is only needed once images are processed; keep it out of module import
+        from PIL import Image
+        
         try:
-            # Load image
-            img = Image.open(io.BytesIO(img_data["data"]))
-            
-            # Check size
-            if img.width < self.config["min_width"] or img.height < self.config["min_height"]:
+            # Reject images the extractor already knows are too small, before any decoding
+            width, height = img_data.get("width", 0), img_data.get("height", 0)
+            if width and height and (width < self._min_w or height < self._min_h):
                 return None
                 
-            # Convert if needed
-            if self.config["image_format"] == "JPEG" and img.mode in ('RGBA', 'LA', 'P'):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                img = rgb_img
-                
-            # Save to bytes
-            output = io.BytesIO()
-            img.save(output, format=self.config["image_format"])
-            processed_data = output.getvalue()
+            image_format = self._fmt
+            ext = img_data.get("ext", "").upper()
             
-            # Base64 encode
-            base64_data = base64.b64encode(processed_data).decode('utf-8')
-            
-            return {
+            if IMAGE_EXT_FORMATS.get(ext) == image_format:
+                # Already in the target format: keep the original bytes, only read the size
+                width, height = img_data.get("width"), img_data.get("height")
+                if not (width and height):
+                    with Image.open(io.BytesIO(img_data["data"])) as img:
+                        width, height = img.size
+                        
+                # Check size
+                if width < self._min_w or height < self._min_h:
+                    return None
+                    
+                processed_data = img_data["data"]
+            else:
+                # Load image
+                img = Image.open(io.BytesIO(img_data["data"]))
+                
+                # Check size
+                if img.width < self._min_w or img.height < self._min_h:
+                    return None
+                    
+                # Convert if needed
+                if image_format == "JPEG" and img.mode in ('RGBA', 'LA', 'P'):
+                    rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+                    img = rgb_img
+                    
+                # Save to bytes
+                output = io.BytesIO()
+                img.save(output, format=image_format)
+                processed_data = output.getvalue()
+                width, height = img.width, img.height
+                
+            result = {
                 "id": f"image_{idx}",
                 "page": img_data["page"],
-                "data": base64_data,
-                "format": self.config["image_format"],
-                "width": img.width,
-                "height": img.height,
+                "format": image_format,
+                "width": width,
+                "height": height,
                 "size_bytes": len(processed_data),
                 "bbox": img_data.get("bbox"),
                 "ocr_ready": True
@@ -178,6 +313,23 @@ class ImageExtractor(BaseExtractor):
             logger.error(f"Image processing error: {e}")
             return None
             
+        # Spill to disk: the result keeps only the file location and digest. Write
+        # failures propagate, so extract() reports them instead of dropping the image
+        if self._spill_dir:
+            digest = hashlib.sha256(processed_data).hexdigest()
+            path = Path(self._spill_dir) / f"{digest}.{image_format.lower()}"
+            await asyncio.to_thread(_write_spilled_image, path, processed_data)
+            result.update({"path": str(path), "sha256": digest, "data": None})
+            return result
+            
+        # Base64 encode. Callers that keep the raw bytes usually turn this off and
+        # encode later themselves, rather than holding both copies at once
+        if self._emit_base64:
+            result["data"] = base64.b64encode(processed_data).decode('ascii')
+        if self._keep_raw_bytes:
+            result["_raw_bytes"] = processed_data
+        return result
+            
     def can_process(self, document_structure: Dict[str, Any]) -> bool:
         """Check if document has images"""
         return True  # Always try to extract
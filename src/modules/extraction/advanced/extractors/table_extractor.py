@@ -2,14 +2,19 @@
 Table Extractor
 Extracts tables while maintaining document context
 """
+import asyncio
+import csv
+import io
 import logging
-from typing import Dict, Any, List, Optional
-import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+# Pages passed to a single camelot.read_pdf call; bounds memory on very long PDFs
+CAMELOT_PAGES_PER_CALL = 50
+
 class TableExtractor(BaseExtractor):
     """
     Extract tables from PDF with structure preservation
@@ -25,13 +30,19 @@ class TableExtractor(BaseExtractor):
             "method": "camelot",  # or "pdfplumber"
             "flavor": "lattice",  # lattice for bordered, stream for borderless
             "accuracy_threshold": 0.8,
-            "max_tables_per_page": 10
+            "max_tables_per_page": 10,
+            "emit_csv": True  # "csv" field; None when disabled
         }
         
         for key, value in defaults.items():
             if key not in self.config:
                 self.config[key] = value
                 
+        # Bound once here; read for every page group and table
+        self._flavor = self.config["flavor"]
+        self._accuracy_threshold = self.config["accuracy_threshold"]
+        self._emit_csv = self.config["emit_csv"]
+                
     async def extract(self, pdf_path: str, document_structure: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract tables from PDF
@@ -53,8 +64,13 @@ class TableExtractor(BaseExtractor):
             errors = []
             
             # Get pages with tables from structure analysis
-            pages_with_tables = document_structure.get("pages_with_tables", [])
-            
+            pages_with_tables, skipped_pages = self._table_pages(document_structure)
+            if skipped_pages:
+                logger.info(f"Skipping {skipped_pages} low-confidence table pages")
+            if not pages_with_tables:
+                logger.info("No table pages left to extract")
+                return {"tables": [], "metadata": {"skipped": True, "pages_skipped": skipped_pages}}
+                
             if self.config["method"] == "camelot":
                 tables_data = await self._extract_with_camelot(
                     pdf_path, 
@@ -81,6 +97,7 @@ class TableExtractor(BaseExtractor):
                     "total_tables": len(tables),
                     "extraction_method": self.config["method"],
                     "pages_processed": len(pages_with_tables),
+                    "pages_skipped": skipped_pages,
                     "errors": errors
                 }
             }
@@ -92,26 +109,57 @@ class TableExtractor(BaseExtractor):
                 "metadata": {"error": str(e)}
             }
             
+    def _table_pages(self, document_structure: Dict[str, Any]) -> Tuple[List[int], int]:
+        """Pages worth running table extraction on, and how many flagged pages were dropped
+        
+        pages_with_tables entries are page numbers or {"page", "confidence"} dicts;
+        dicts below accuracy_threshold are dropped. Without that list, pages the
+        analyzer marked has_tables are used.
+        """
+        entries = document_structure.get("pages_with_tables")
+        if entries is None:
+            entries = [
+                page_info["page_number"]
+                for page_info in document_structure.get("pages", [])
+                if page_info.get("has_tables")
+            ]
+            
+        pages = set()
+        skipped = 0
+        for entry in entries:
+            if isinstance(entry, dict):
+                if entry.get("confidence", 1.0) < self._accuracy_threshold:
+                    skipped += 1
+                    continue
+                entry = entry["page"]
+            pages.add(int(entry))
+        return sorted(pages), skipped
+        
     async def _extract_with_camelot(self, pdf_path: str, pages: List[int]) -> List[Dict]:
         """Extract using Camelot library"""
+        if not pages:
+            return []
+            
         try:
             import camelot
             
             tables_data = []
             
-            for page_num in pages:
-                # Extract tables from specific page
-                tables = camelot.read_pdf(
+            # One read_pdf call per group of pages instead of re-opening the PDF for every page
+            for start in range(0, len(pages), CAMELOT_PAGES_PER_CALL):
+                page_group = pages[start:start + CAMELOT_PAGES_PER_CALL]
+                tables = await asyncio.to_thread(
+                    camelot.read_pdf,
                     pdf_path,
-                    pages=str(page_num),
-                    flavor=self.config["flavor"]
+                    pages=",".join(str(page_num) for page_num in page_group),
+                    flavor=self._flavor
                 )
                 
                 for table in tables:
-                    if table.accuracy >= self.config["accuracy_threshold"]:
+                    if table.accuracy >= self._accuracy_threshold:
                         tables_data.append({
                             "data": table.df,
-                            "page": page_num,
+                            "page": int(table.page),
                             "accuracy": table.accuracy,
                             "bbox": table._bbox  # Bounding box for layout
                         })
@@ -126,48 +174,61 @@ class TableExtractor(BaseExtractor):
         """Extract using pdfplumber"""
         try:
             import pdfplumber
-            
-            tables_data = []
-            
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num in pages:
-                    if page_num <= len(pdf.pages):
-                        page = pdf.pages[page_num - 1]
-                        tables = page.extract_tables()
-                        
-                        for idx, table in enumerate(tables):
-                            if table:  # Not empty
-                                df = pd.DataFrame(table[1:], columns=table[0])
-                                tables_data.append({
-                                    "data": df,
-                                    "page": page_num,
-                                    "accuracy": 0.9,  # pdfplumber doesn't provide accuracy
-                                    "bbox": None
-                                })
-                                
-            return tables_data
-            
         except ImportError:
             logger.error("pdfplumber not installed")
             return []
             
+        # pdfplumber parsing is synchronous, keep it off the event loop
+        return await asyncio.to_thread(self._extract_pdfplumber_pages, pdfplumber, pdf_path, pages)
+        
+    def _extract_pdfplumber_pages(self, pdfplumber, pdf_path: str, pages: List[int]) -> List[Dict]:
+        """Blocking body of _extract_with_pdfplumber; visits pages in ascending order"""
+        tables_data = []
+        
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in sorted(pages):
+                if page_num < 1:
+                    continue
+                try:
+                    page = pdf.pages[page_num - 1]
+                except IndexError:
+                    continue
+                tables = page.extract_tables()
+                
+                for idx, table in enumerate(tables):
+                    if table:  # Not empty
+                        tables_data.append({
+                            "headers": table[0],
+                            "rows": table[1:],
+                            "page": page_num,
+                            "accuracy": 0.9,  # pdfplumber doesn't provide accuracy
+                            "bbox": None
+                        })
+                        
+        return tables_data
+        
     def _process_table(self, table_data: Dict, idx: int) -> Dict[str, Any]:
         """
         Process and standardize table data
         Ensures consistent format for integration
         """
+        if "rows" in table_data:
+            return self._process_rows(table_data, idx)
+            
         df = table_data["data"]
         
-        # Clean data
-        df = df.dropna(how='all')  # Remove empty rows
-        df = df.dropna(axis=1, how='all')  # Remove empty columns
+        # Clean data: drop empty rows and columns from one missing-value mask
+        missing = df.isna().to_numpy()
+        row_keep = (~missing.all(axis=1)).nonzero()[0]
+        col_keep = (~missing.all(axis=0)).nonzero()[0]
+        df = df.iloc[row_keep, col_keep]
         
         # Standardized format for integration
         return {
             "id": f"table_{idx}",
             "page": table_data["page"],
             "data": df.to_dict('records'),  # List of dicts
-            "csv": df.to_csv(index=False),   # CSV format
+            "csv": df.to_csv(index=False) if self._emit_csv else None,   # CSV format
             "shape": df.shape,
             "headers": df.columns.tolist(),
             "accuracy": table_data.get("accuracy", 0),
@@ -178,6 +239,49 @@ class TableExtractor(BaseExtractor):
             }
         }
         
+    def _process_rows(self, table_data: Dict, idx: int) -> Dict[str, Any]:
+        """_process_table for plain header/row lists, without building a DataFrame"""
+        headers = table_data["headers"]
+        
+        import numpy as np
+        
+        raw_rows = table_data["rows"]
+        
+        # Clean data: drop rows, then columns, whose cells are all empty (None).
+        # Cells are checked once; the row and column reductions run in NumPy.
+        filled = np.array(
+            [[cell is not None for cell in row] for row in raw_rows], dtype=bool
+        ).reshape(len(raw_rows), len(headers))
+        rows = [row for row, kept in zip(raw_rows, filled.any(axis=1).tolist()) if kept]
+        keep = np.flatnonzero(filled.any(axis=0)).tolist()
+        if len(keep) < len(headers):
+            headers = [headers[i] for i in keep]
+            rows = [[row[i] for i in keep] for row in rows]
+            
+        csv_text = None
+        if self._emit_csv:
+            output = io.StringIO()
+            writer = csv.writer(output, lineterminator="\n")
+            writer.writerow(headers)
+            writer.writerows(rows)
+            csv_text = output.getvalue()
+            
+        # Standardized format for integration
+        return {
+            "id": f"table_{idx}",
+            "page": table_data["page"],
+            "data": [dict(zip(headers, row)) for row in rows],  # List of dicts
+            "csv": csv_text,   # CSV format
+            "shape": (len(rows), len(headers)),
+            "headers": list(headers),
+            "accuracy": table_data.get("accuracy", 0),
+            "bbox": table_data.get("bbox"),  # For layout preservation
+            "context": {
+                "before_table": None,  # Text before table
+                "after_table": None    # Text after table
+            }
+        }
+        
     def can_process(self, document_structure: Dict[str, Any]) -> bool:
         """Check if document has tables to extract"""
         return document_structure.get("has_tables", False) or \
@@ -188,4 +292,4 @@ class TableExtractor(BaseExtractor):
         if self.config["method"] == "camelot":
             return ["camelot-py[cv]", "pandas"]
         else:
-            return ["pdfplumber", "pandas"]
+            return ["pdfplumber"]
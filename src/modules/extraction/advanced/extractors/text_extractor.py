@@ -2,14 +2,28 @@
 Text Extractor with Layout Preservation
 Extracts text while maintaining document structure
 """
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import re
 
+from src.utils.page_pool import PAGE_POOL_MAX_WORKERS, page_pool_workers, run_page_ranges_async, threadsafe_mp_context
 from ..base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+# PDFs up to this many pages are extracted serially; past it pages are split across
+# processes. MuPDF parses a page in well under a millisecond, pdfplumber in ~15 ms.
+TEXT_PARALLEL_MIN_PAGES = {"pymupdf": 400, "pdfplumber": 8}
+
+def _extract_text_page_range(extractor: "TextExtractor", backend: str, pdf_path: str,
+                             page_range: Optional[range], page_structs: List[Dict]) -> List[Tuple[str, Optional[Dict]]]:
+    """(text, layout) per page for a contiguous range of pages, or all pages for None (process pool entry point)"""
+    if backend == "pymupdf":
+        return extractor._pymupdf_pages(pdf_path, page_range)
+    return extractor._pdfplumber_pages(pdf_path, page_range, page_structs)
+
 class TextExtractor(BaseExtractor):
     """
     Extract text with layout and structure preservation
@@ -26,13 +40,18 @@ class TextExtractor(BaseExtractor):
             "preserve_formatting": True,
             "line_overlap_threshold": 5,
             "paragraph_gap_threshold": 15,
-            "extract_method": "pdfplumber"  # or "pymupdf"
+            "extract_method": "pymupdf",  # or "pdfplumber"
+            "num_workers": PAGE_POOL_MAX_WORKERS
         }
         
         for key, value in defaults.items():
             if key not in self.config:
                 self.config[key] = value
                 
+        # Bound once here; read for every line and character
+        self._line_overlap = self.config["line_overlap_threshold"]
+        self._paragraph_gap = self.config["paragraph_gap_threshold"]
+                
     async def extract(self, pdf_path: str, document_structure: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract text from PDF with layout preservation
@@ -40,7 +59,13 @@ class TextExtractor(BaseExtractor):
         try:
             logger.info(f"Starting text extraction from {pdf_path}")
             
-            if self.config["extract_method"] == "pdfplumber":
+            # PyMuPDF is much faster; pdfplumber's character geometry is only
+            # needed to reorder multi-column pages when preserving layout
+            multi_column = any(
+                page_info.get("layout") == "multi_column"
+                for page_info in document_structure.get("pages", [])
+            )
+            if self.config["extract_method"] == "pdfplumber" or (self.config["preserve_layout"] and multi_column):
                 result = await self._extract_with_pdfplumber(pdf_path, document_structure)
             else:
                 result = await self._extract_with_pymupdf(pdf_path, document_structure)
@@ -58,17 +83,53 @@ class TextExtractor(BaseExtractor):
                 "metadata": {"error": str(e)}
             }
             
+    async def _extract_pages(self, backend: str, pdf_path: str, structure: Dict[str, Any]) -> Tuple[List[str], List[Dict]]:
+        """Page texts and layout info, extracted serially or across a process pool"""
+        page_count = structure.get("page_count") or 0
+        # Workers only need each page's layout class, not the whole structure
+        page_structs = [{"layout": page_info.get("layout")} for page_info in structure.get("pages", [])]
+        
+        # Small PDFs and an unknown page count extract serially, still off the event loop.
+        # Other extractors run in threads alongside this one, so the pool mustn't fork
+        workers = page_pool_workers(page_count, TEXT_PARALLEL_MIN_PAGES[backend], self.config["num_workers"])
+        if not workers:
+            pages = await asyncio.to_thread(_extract_text_page_range, self, backend, pdf_path, None, page_structs)
+        else:
+            pages = await run_page_ranges_async(
+                functools.partial(_extract_text_page_range, self, backend, pdf_path, page_structs=page_structs),
+                page_count, workers, threadsafe_mp_context()
+            )
+            
+        return [page_text for page_text, _ in pages], [layout for _, layout in pages if layout]
+        
     async def _extract_with_pdfplumber(self, pdf_path: str, structure: Dict[str, Any]) -> Dict[str, Any]:
         """Extract text using pdfplumber with layout preservation"""
+        pages_text, layout_info = await self._extract_pages("pdfplumber", pdf_path, structure)
+        
+        return {
+            "text": "\n\n".join(pages_text).strip(),
+            "pages": pages_text,
+            "layout": layout_info,
+            "metadata": {
+                "extraction_method": "pdfplumber",
+                "layout_preserved": self.config["preserve_layout"],
+                "page_count": len(pages_text)
+            }
+        }
+        
+    def _pdfplumber_pages(self, pdf_path: str, page_range: Optional[range],
+                          page_structs: List[Dict]) -> List[Tuple[str, Optional[Dict]]]:
+        """(text, layout) for each page in page_range (all pages for None) using pdfplumber"""
         import pdfplumber
         
-        full_text = ""
-        pages_text = []
-        layout_info = []
+        pages = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                page_struct = structure["pages"][page_num] if page_num < len(structure.get("pages", [])) else {}
+        # Only the requested pages are parsed
+        page_numbers = None if page_range is None else [page_num + 1 for page_num in page_range]
+        with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                page_num = page.page_number - 1
+                page_struct = page_structs[page_num] if page_num < len(page_structs) else {}
                 
                 if self.config["preserve_layout"]:
                     # Extract with layout
@@ -77,27 +138,18 @@ class TextExtractor(BaseExtractor):
                     # Simple extraction
                     page_text = page.extract_text() or ""
                     
-                pages_text.append(page_text)
-                full_text += page_text + "\n\n"
-                
                 # Extract layout information
+                layout = None
                 if page.chars:
-                    layout_info.append({
+                    layout = {
                         "page": page_num + 1,
                         "lines": self._extract_lines(page.chars),
                         "fonts": self._extract_fonts(page.chars)
-                    })
+                    }
                     
-        return {
-            "text": full_text.strip(),
-            "pages": pages_text,
-            "layout": layout_info,
-            "metadata": {
-                "extraction_method": "pdfplumber",
-                "layout_preserved": self.config["preserve_layout"],
-                "page_count": len(pages_text)
-            }
-        }
+                pages.append((page_text, layout))
+                
+        return pages
         
     def _extract_page_with_layout(self, page, page_structure: Dict[str, Any]) -> str:
         """Extract page text preserving layout"""
@@ -114,8 +166,12 @@ class TextExtractor(BaseExtractor):
         if page_structure.get("layout") == "multi_column":
             lines = self._handle_multi_column(lines)
             
-        # Build text with proper spacing
-        text = ""
+        return self._join_lines(lines)
+        
+    def _join_lines(self, lines: List[Dict]) -> str:
+        """Join ordered lines, leaving a blank line where the vertical gap marks a paragraph"""
+        # Build text with proper spacing, joined once at the end
+        parts: List[str] = []
         prev_line = None
         
         for line in lines:
@@ -123,38 +179,37 @@ class TextExtractor(BaseExtractor):
                 # Calculate gap between lines
                 gap = line["top"] - prev_line["bottom"]
                 
-                if gap > self.config["paragraph_gap_threshold"]:
+                if gap > self._paragraph_gap:
                     # Paragraph break
-                    text += "\n\n"
+                    parts.append("\n\n")
                 else:
                     # Normal line break
-                    text += "\n"
+                    parts.append("\n")
                     
-            text += line["text"]
+            parts.append(line["text"])
             prev_line = line
             
-        return text
+        return "".join(parts)
         
     def _group_chars_into_lines(self, chars: List[Dict]) -> List[Dict]:
         """Group characters into lines based on vertical position"""
         if not chars:
             return []
             
+        line_overlap = self._line_overlap
         lines = []
         current_line = {
             "top": chars[0]["top"],
             "bottom": chars[0]["bottom"],
             "left": chars[0]["x0"],
             "right": chars[0]["x1"],
-            "text": chars[0].get("text", ""),
             "chars": [chars[0]]
         }
         
         for char in chars[1:]:
             # Check if same line (vertical overlap)
-            if abs(char["top"] - current_line["top"]) < self.config["line_overlap_threshold"]:
+            if abs(char["top"] - current_line["top"]) < line_overlap:
                 # Add to current line
-                current_line["text"] += char.get("text", "")
                 current_line["right"] = max(current_line["right"], char["x1"])
                 current_line["bottom"] = max(current_line["bottom"], char["bottom"])
                 current_line["chars"].append(char)
@@ -166,13 +221,12 @@ class TextExtractor(BaseExtractor):
                     "bottom": char["bottom"],
                     "left": char["x0"],
                     "right": char["x1"],
-                    "text": char.get("text", ""),
                     "chars": [char]
                 }
                 
         lines.append(current_line)
         
-        # Sort characters within each line by x position
+        # Sort characters within each line by x position; text is built once here
         for line in lines:
             line["chars"].sort(key=lambda x: x["x0"])
             line["text"] = "".join(c.get("text", "") for c in line["chars"])
@@ -266,32 +320,104 @@ class TextExtractor(BaseExtractor):
         
     async def _extract_with_pymupdf(self, pdf_path: str, structure: Dict[str, Any]) -> Dict[str, Any]:
         """Extract text using PyMuPDF"""
-        import fitz
-        
-        doc = fitz.open(pdf_path)
-        full_text = ""
-        pages_text = []
-        
-        for page in doc:
-            page_text = page.get_text()
-            pages_text.append(page_text)
-            full_text += page_text + "\n\n"
-            
-        doc.close()
+        pages_text, layout_info = await self._extract_pages("pymupdf", pdf_path, structure)
         
         return {
-            "text": full_text.strip(),
+            "text": "\n\n".join(pages_text).strip(),
             "pages": pages_text,
+            "layout": layout_info,
             "metadata": {
                 "extraction_method": "pymupdf",
+                "layout_preserved": self.config["preserve_layout"],
                 "page_count": len(pages_text)
             }
         }
         
+    def _pymupdf_pages(self, pdf_path: str, page_range: Optional[range]) -> List[Tuple[str, Optional[Dict]]]:
+        """(text, layout) for each page in page_range (all pages for None), with the pdfplumber layout schema"""
+        import fitz
+        
+        pages = []
+        with fitz.open(pdf_path) as doc:
+            for page_num in range(doc.page_count) if page_range is None else page_range:
+                # The caller's page count may come from another parser
+                if page_num >= doc.page_count:
+                    break
+                    
+                page = doc.load_page(page_num)
+                
+                if self.config["preserve_layout"]:
+                    lines, fonts = self._pymupdf_lines(page)
+                    page_text = self._join_lines(lines)
+                else:
+                    lines = []
+                    page_text = page.get_text()
+                    
+                # Extract layout information
+                layout = None
+                if lines:
+                    layout = {
+                        "page": page_num + 1,
+                        "lines": [
+                            {
+                                "text": line["text"],
+                                "bbox": [line["left"], line["top"], line["right"], line["bottom"]]
+                            }
+                            for line in lines
+                        ],
+                        "fonts": fonts
+                    }
+                    
+                pages.append((page_text, layout))
+                
+        return pages
+        
+    def _pymupdf_lines(self, page) -> Tuple[List[Dict], Dict[str, int]]:
+        """Lines and per-font character counts from page.get_text("dict")
+        
+        MuPDF lines at the same height (within line_overlap_threshold) are merged
+        left to right, matching how _group_chars_into_lines groups characters.
+        """
+        segments = []
+        fonts = {}
+        
+        for block in page.get_text("dict")["blocks"]:
+            # Image blocks (type 1) carry no lines
+            for line in block.get("lines", []):
+                spans = line["spans"]
+                if not spans:
+                    continue
+                # Vertical extent as pdfplumber measures characters: font size
+                # tall, bottom at baseline + descent (MuPDF's line bbox is taller)
+                bottoms = [span["origin"][1] - span["descender"] * span["size"] for span in spans]
+                y0 = min(bottom - span["size"] for bottom, span in zip(bottoms, spans))
+                y1 = max(bottoms)
+                for span in spans:
+                    fonts[span["font"]] = fonts.get(span["font"], 0) + len(span["text"])
+                x0, _, x1, _ = line["bbox"]
+                segments.append(((x0, y0, x1, y1), "".join(span["text"] for span in spans)))
+                
+        line_overlap = self._line_overlap
+        lines = []
+        for (x0, y0, x1, y1), text in sorted(segments, key=lambda x: x[0][1]):
+            if lines and abs(y0 - lines[-1]["top"]) < line_overlap:
+                current_line = lines[-1]
+                current_line["parts"].append((x0, text))
+                current_line["left"] = min(current_line["left"], x0)
+                current_line["right"] = max(current_line["right"], x1)
+                current_line["bottom"] = max(current_line["bottom"], y1)
+            else:
+                lines.append({"top": y0, "bottom": y1, "left": x0, "right": x1, "parts": [(x0, text)]})
+                
+        for line in lines:
+            line["text"] = " ".join(text for _, text in sorted(line.pop("parts"), key=lambda x: x[0]))
+            
+        return lines, fonts
+        
     def can_process(self, document_structure: Dict[str, Any]) -> bool:
         """Text extraction is always possible"""
         return True
         
     def get_dependencies(self) -> List[str]:
         """Get required dependencies"""
-        return ["pdfplumber", "PyMuPDF"]
+        return ["PyMuPDF", "pdfplumber"]
@@ -2,7 +2,9 @@
 OCR Processor
 Optical Character Recognition for images and scanned PDFs
 """
+import asyncio
 import logging
+import os
 from typing import Dict, Any, List, Optional
 import pytesseract
 from PIL import Image
@@ -14,6 +16,16 @@ from ..base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+# Images are OCR'd in parallel, one Tesseract process each; stop each one from also spawning OpenMP threads
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Grayscale level above which a pixel becomes white
+BINARIZE_THRESHOLD = 127
+
+def _binarize(img_array: np.ndarray, threshold: int) -> np.ndarray:
+    """Map a grayscale uint8 image to 0/255 in a single uint8 pass"""
+    return np.multiply(img_array > threshold, 255, dtype=np.uint8)
+
 class OCRProcessor(BaseExtractor):
     """
     OCR processing for images and scanned PDFs
@@ -46,6 +58,11 @@ class OCRProcessor(BaseExtractor):
             image_data: Image data (bytes, path, or PIL Image)
             context: Additional context (page number, etc.)
         """
+        # Tesseract and preprocessing block; run them in a thread so several images can be in flight
+        return await asyncio.to_thread(self._extract_sync, image_data)
+        
+    def _extract_sync(self, image_data: Any) -> Dict[str, Any]:
+        """Blocking body of extract"""
         try:
             # Load image
             image = self._load_image(image_data)
@@ -149,8 +166,7 @@ class OCRProcessor(BaseExtractor):
         img_array = np.array(image)
         
         # Apply thresholding
-        threshold = 127
-        img_array = ((img_array > threshold) * 255).astype(np.uint8)
+        img_array = _binarize(img_array, BINARIZE_THRESHOLD)
         
         # Denoise (simple median filter)
         from scipy.ndimage import median_filter
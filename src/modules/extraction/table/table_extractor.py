@@ -126,9 +126,11 @@ class TableExtractor:
         """Process a single table"""
         df = table.df
         
-        # Clean empty rows and columns
-        df = df.dropna(how='all', axis=0)
-        df = df.dropna(how='all', axis=1)
+        # Clean empty rows and columns from one missing-value mask
+        missing = df.isna().to_numpy()
+        row_keep = (~missing.all(axis=1)).nonzero()[0]
+        col_keep = (~missing.all(axis=0)).nonzero()[0]
+        df = df.iloc[row_keep, col_keep]
         
         return {
             'table_id': f'page_{table.page}_table_{method}_{id(table)}',
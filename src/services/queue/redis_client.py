@@ -3,8 +3,65 @@ from src.core.config import settings
 
 _redis_client = None
 
+JOB_KEY_PREFIX = "prismy:job:"
+JOB_TTL_SECONDS = 86400  # 24 hours
+OUTPUT_KEY_PREFIX = "prismy:output:"
+
+# KEYS[1] = job hash
+# ARGV[1] = ttl, ARGV[2..] = field/value pairs
+_CREATE_JOB_LUA = """
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# KEYS[1] = job hash
+# ARGV[1] = ttl, ARGV[2] = new status, ARGV[3..] = extra field/value pairs
+# A job whose hash already expired is left alone rather than recreated partially
+_TRANSITION_JOB_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
 def get_redis_client():
     global _redis_client
     if _redis_client is None:
         _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
     return _redis_client
+
+# Registered once; callers pass their own client when invoking
+_create_job_script = get_redis_client().register_script(_CREATE_JOB_LUA)
+_transition_job_script = get_redis_client().register_script(_TRANSITION_JOB_LUA)
+
+def _flatten_mapping(mapping: dict) -> list:
+    """Flatten a field mapping into [field, value, ...] for script ARGV"""
+    args = []
+    for key, value in mapping.items():
+        args.append(key)
+        args.append(value)
+    return args
+
+def create_job_hash(client, job_id: str, mapping: dict, ttl: int = JOB_TTL_SECONDS) -> None:
+    """Atomically write the job hash and its TTL in one round-trip"""
+    _create_job_script(
+        keys=[f"{JOB_KEY_PREFIX}{job_id}"],
+        args=[ttl, *_flatten_mapping(mapping)],
+        client=client,
+    )
+
+def transition_job_status(client, job_id: str, status: str, mapping: dict = None, ttl: int = JOB_TTL_SECONDS) -> bool:
+    """Atomically set the job status with any extra fields and refresh its TTL
+    
+    Returns False, writing nothing, if the job hash no longer exists.
+    """
+    fields = dict(mapping or {})
+    fields.pop('status', None)
+    return bool(_transition_job_script(
+        keys=[f"{JOB_KEY_PREFIX}{job_id}"],
+        args=[ttl, status, *_flatten_mapping(fields)],
+        client=client,
+    ))
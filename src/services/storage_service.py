@@ -1,5 +1,5 @@
 """
-File Storage Service - Simple version without aiofiles
+File Storage Service - uploads are streamed to disk with aiofiles
 """
 import os
 import shutil
@@ -8,8 +8,12 @@ from typing import Optional
 from pathlib import Path
 import logging
 
+import aiofiles
+
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
 class StorageService:
     """Handle file storage operations"""
     
@@ -23,13 +27,13 @@ class StorageService:
         for dir_path in [self.uploads_dir, self.outputs_dir, self.temp_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
             
-    async def save_upload(self, file_data: bytes, filename: str) -> str:
-        """Save uploaded file - simple sync version"""
+    async def save_upload(self, upload, filename: str) -> str:
+        """Stream an uploaded file (anything with async read(size)) to disk in 1MB chunks"""
         file_path = self.uploads_dir / filename
         
-        # Simple sync write
-        with open(file_path, 'wb') as f:
-            f.write(file_data)
+        async with aiofiles.open(file_path, 'wb') as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
             
         logger.info(f"Saved upload: {file_path}")
         return str(file_path)
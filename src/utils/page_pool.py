@@ -0,0 +1,51 @@
+"""
+Process pool helpers for page-parallel PDF work
+Callers split a document into contiguous page ranges and run them in worker processes
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# Worker processes per pool; extraction can run several pools at the same time
+PAGE_POOL_MAX_WORKERS = 4
+
+def page_pool_workers(page_count: int, min_pages: int, max_workers: int = PAGE_POOL_MAX_WORKERS) -> int:
+    """Number of worker processes for page_count pages, or 0 to work serially
+
+    Documents up to min_pages, single-CPU hosts and daemonic processes
+    (Celery prefork workers can't spawn children) stay serial.
+    """
+    workers = min(os.cpu_count() or 1, max_workers, page_count)
+    if page_count <= min_pages or workers <= 1 or multiprocessing.current_process().daemon:
+        return 0
+    return workers
+
+def threadsafe_mp_context() -> multiprocessing.context.BaseContext:
+    """Start method for pools created while other threads are running
+
+    Forking a threaded process can copy locks held by another thread into the
+    child, so workers come from a forkserver (or spawn where that's missing).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+def split_page_ranges(page_count: int, workers: int) -> List[range]:
+    """One contiguous page range per worker"""
+    return [range(page_count * i // workers, page_count * (i + 1) // workers) for i in range(workers)]
+
+def run_page_ranges(fn: Callable[[range], List[Any]], page_count: int, workers: int,
+                    mp_context: Optional[multiprocessing.context.BaseContext] = None) -> List[Any]:
+    """Call fn(page_range) for each worker's range in a process pool, results concatenated in page order
+
+    fn must be picklable: a module-level function, or a functools.partial of one.
+    """
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        chunks = list(executor.map(fn, split_page_ranges(page_count, workers)))
+    return [item for chunk in chunks for item in chunk]
+
+async def run_page_ranges_async(fn: Callable[[range], List[Any]], page_count: int, workers: int,
+                                mp_context: Optional[multiprocessing.context.BaseContext] = None) -> List[Any]:
+    """run_page_ranges off the event loop, including pool start-up and shutdown"""
+    return await asyncio.to_thread(run_page_ranges, fn, page_count, workers, mp_context)
@@ -0,0 +1,24 @@
+from src.celery_tasks.prismy_tasks import _split_text_into_chunks
+
+
+def test_short_text_is_one_chunk():
+    assert _split_text_into_chunks("One.\nTwo.", max_chunk_size=100) == ["One.\nTwo."]
+
+
+def test_paragraphs_are_packed_with_blank_lines():
+    text = "\n\n".join(["a" * 30, "b" * 30, "c" * 30])
+    assert _split_text_into_chunks(text, max_chunk_size=70) == ["a" * 30 + "\n\n" + "b" * 30, "c" * 30]
+
+
+def test_wrapped_sentences_are_joined_with_single_spaces():
+    # Hard-wrapped .txt paragraph: sentences separated by a newline or extra spaces
+    text = "First sentence here.\nSecond sentence here.  Third sentence here.\nFourth one."
+    assert _split_text_into_chunks(text, max_chunk_size=50) == [
+        "First sentence here. Second sentence here.",
+        "Third sentence here. Fourth one.",
+    ]
+
+
+def test_sentence_tail_continues_with_next_paragraph():
+    text = "Alpha alpha alpha.\nBeta beta beta.\n\nGamma."
+    assert _split_text_into_chunks(text, max_chunk_size=30) == ["Alpha alpha alpha.", "Beta beta beta.\n\nGamma."]
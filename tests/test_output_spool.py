@@ -0,0 +1,36 @@
+import os
+
+from src.celery_tasks import prismy_tasks
+from src.celery_tasks.prismy_tasks import OutputSpool
+
+
+def test_small_output_stays_in_memory(tmp_path):
+    path = tmp_path / "out.txt"
+    with OutputSpool(str(path)) as spool:
+        spool.write("xin chào")
+        assert spool.getvalue() == "xin chào".encode('utf-8')
+    assert not os.listdir(tmp_path)
+
+
+def test_large_output_spills_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(prismy_tasks, 'OUTPUT_REDIS_MAX_BYTES', 8)
+    path = tmp_path / "out.txt"
+    with OutputSpool(str(path)) as spool:
+        spool.write("12345")
+        spool.write("67890")
+        spool.write("é")
+        assert spool.getvalue() is None
+        assert spool.commit() == str(path)
+    assert path.read_text(encoding='utf-8') == "1234567890é"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_uncommitted_spill_is_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(prismy_tasks, 'OUTPUT_REDIS_MAX_BYTES', 4)
+    try:
+        with OutputSpool(str(tmp_path / "out.txt")) as spool:
+            spool.write("too long")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,35 @@
+import asyncio
+import io
+
+from src.celery_tasks import prismy_tasks
+
+
+class _EchoProvider:
+    async def translate(self, text, target_language, source_language):
+        return text
+
+
+class _RecordingProgress:
+    def __init__(self):
+        self.fields = {}
+        self.history = []
+
+    def update(self, field, value):
+        self.fields[field] = value
+
+    def maybe_flush(self):
+        self.history.append(self.fields.get('progress'))
+
+
+def test_progress_follows_translated_text(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("\n\n".join(f"Paragraph number {i}. " * 40 for i in range(12)), encoding='utf-8')
+    progress = _RecordingProgress()
+
+    chunk_count = asyncio.run(prismy_tasks._stream_translation(
+        _EchoProvider(), str(path), 'txt', 'vi', io.StringIO(), progress
+    ))
+
+    assert chunk_count == len(progress.history) > 1
+    assert progress.history == sorted(progress.history)
+    assert 10 <= progress.history[0] < progress.history[-1] <= 95
@@ -0,0 +1,26 @@
+from src.celery_tasks.prismy_tasks import text_processor
+
+
+def _paragraphs(tmp_path, data: bytes):
+    path = tmp_path / "input.txt"
+    path.write_bytes(data)
+    return [page['text'] for page in text_processor.process_text(str(path))['pages']]
+
+
+def test_lf_paragraphs(tmp_path):
+    assert _paragraphs(tmp_path, b"para one\nline two\n\npara two") == ["para one\nline two", "para two"]
+
+
+def test_crlf_paragraphs(tmp_path):
+    assert _paragraphs(tmp_path, b"para one\r\nline two\r\n\r\npara two\r\n") == ["para one\nline two", "para two"]
+
+
+def test_cr_paragraphs_with_bom(tmp_path):
+    assert _paragraphs(tmp_path, b"\xef\xbb\xbfpara one\r\rpara two") == ["para one", "para two"]
+
+
+def test_crlf_paragraphs_non_utf8(tmp_path):
+    data = "café au lait\r\n\r\ncrème brûlée".encode('latin-1')
+    texts = _paragraphs(tmp_path, data)
+    assert len(texts) == 2
+    assert not any('\r' in text for text in texts)